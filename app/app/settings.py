@@ -11,10 +11,11 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 
 from celery.schedules import crontab
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -30,6 +31,8 @@ DEBUG = config('DEBUG', cast=bool, default=False)
 
 ALLOWED_HOSTS = []
 
+TESTING = 'test' in sys.argv
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -39,6 +42,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'core',
     'user',
@@ -97,6 +101,31 @@ DATABASES = {
 
 AUTH_USER_MODEL = 'core.User'
 
+# Cache
+# Redis in deployments; tests and setups without REDIS_URL fall back to a per-process local-memory cache.
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL and not TESTING:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+BOOKS_CACHE_TIMEOUT = config('BOOKS_CACHE_TIMEOUT', cast=int, default=300)
+STAFF_EMAILS_CACHE_TIMEOUT = config('STAFF_EMAILS_CACHE_TIMEOUT', cast=int, default=3600)
+PRINCIPAL_CACHE_TIMEOUT = config('PRINCIPAL_CACHE_TIMEOUT', cast=int, default=300)
+PRINCIPAL_LOCAL_CACHE_TTL = config('PRINCIPAL_LOCAL_CACHE_TTL', cast=int, default=5)
+PRINCIPAL_LOCAL_CACHE_SIZE = config('PRINCIPAL_LOCAL_CACHE_SIZE', cast=int, default=1024)
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -141,7 +170,35 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'user.authentication.JWTAuthentication',
     ),
+    # Number of trusted proxies in front of the app. With 0, per-IP throttles key on REMOTE_ADDR and ignore any
+    # client-supplied X-Forwarded-For header; behind N proxies they use the address the outermost proxy saw.
+    'NUM_PROXIES': config('NUM_PROXIES', cast=int, default=0),
+    # Token bucket rates per view scope and key (see core.throttling): 'num/period' allows bursts of num requests.
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': config('THROTTLE_LOGIN_IP_RATE', default='30/min'),
+        'login_email': config('THROTTLE_LOGIN_EMAIL_RATE', default='5/min'),
+        'register_ip': config('THROTTLE_REGISTER_IP_RATE', default='20/hour'),
+        'register_email': config('THROTTLE_REGISTER_EMAIL_RATE', default='3/hour'),
+        'borrow_user': config('THROTTLE_BORROW_USER_RATE', default='30/min'),
+    },
 }
+if REDIS_URL and not TESTING:
+    THROTTLE_BACKEND = 'core.throttling.RedisTokenBuckets'
+else:
+    THROTTLE_BACKEND = 'core.throttling.MemoryTokenBuckets'
+
+# Access tokens issued by LoginView and TokenRefreshView; revoked ones are listed in Redis and mirrored in each
+# process. Refresh tokens are single use and replaced on every refresh.
+JWT_SIGNING_KEY = config('JWT_SIGNING_KEY', default=SECRET_KEY)
+JWT_ACCESS_TOKEN_MINUTES = config('JWT_ACCESS_TOKEN_MINUTES', cast=int, default=60)
+JWT_REFRESH_TOKEN_DAYS = config('JWT_REFRESH_TOKEN_DAYS', cast=int, default=30)
+# Revocations must outlive memory pressure, so they belong in a Redis with maxmemory-policy noeviction rather than
+# in the cache instance, which evicts keys with a TTL.
+TOKEN_REVOCATION_REDIS_URL = config('TOKEN_REVOCATION_REDIS_URL', default=REDIS_URL)
+if TOKEN_REVOCATION_REDIS_URL and not TESTING:
+    TOKEN_REVOCATION_BACKEND = 'user.revocation.RedisRevocationList'
+else:
+    TOKEN_REVOCATION_BACKEND = 'user.revocation.MemoryRevocationList'
 
 # Email settings
 EMAIL_HOST = config('EMAIL_HOST')
@@ -155,3 +212,21 @@ CELERY_BROKER_URL = config('CELERY_BROKER_URL')
 CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND')
 CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', cast=bool)
 CELERY_EAGER_PROPAGATES_EXCEPTIONS = config('CELERY_EAGER_PROPAGATES_EXCEPTIONS', cast=bool)
+
+# How often the outbox dispatcher sends the notification emails queued by borrow and return requests.
+OUTBOX_DISPATCH_INTERVAL_SECONDS = config('OUTBOX_DISPATCH_INTERVAL_SECONDS', cast=int, default=10)
+
+# Staff notifications: 'event' emails staff on every borrow/return, 'digest' sends one summary per interval.
+STAFF_NOTIFICATION_MODE = config('STAFF_NOTIFICATION_MODE', default='event')
+STAFF_DIGEST_INTERVAL_MINUTES = config('STAFF_DIGEST_INTERVAL_MINUTES', cast=int, default=15)
+
+# Overdue loans handled by one parallel notification task.
+OVERDUE_NOTIFICATION_CHUNK_SIZE = config('OVERDUE_NOTIFICATION_CHUNK_SIZE', cast=int, default=500)
+# Days past the due date at which the first, second, ... overdue reminder is sent.
+OVERDUE_REMINDER_SCHEDULE_DAYS = config('OVERDUE_REMINDER_SCHEDULE_DAYS', cast=Csv(int), default='1,7,14')
+
+# Returned loans older than this are moved from BorrowRecord to ArchivedBorrowRecord by the nightly archival job.
+BORROW_ARCHIVE_AFTER_DAYS = config('BORROW_ARCHIVE_AFTER_DAYS', cast=int, default=365)
+
+# Processes hashing passwords during bulk visitor registration; 0 uses one per CPU.
+BULK_REGISTRATION_HASH_WORKERS = config('BULK_REGISTRATION_HASH_WORKERS', cast=int, default=0)
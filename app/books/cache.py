@@ -0,0 +1,62 @@
+"""
+Versioned read cache for serialized book payloads.
+
+Every key embeds the current catalog version. Any write to books bumps the version, which makes all previously cached
+payloads unreachable at once; they are never read again and expire through their TTL (or the Redis eviction policy).
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'books:version'
+
+
+def get_version():
+    """
+    Return the current catalog version, initialising it if the key is missing.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seeding from the clock keeps a lost version key from resurrecting payloads cached under an old version.
+        cache.add(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def list_key(request):
+    """
+    Build the cache key of a book list page from the full request URL (query, cursor and page size).
+    """
+    url_hash = hashlib.sha1(request.build_absolute_uri().encode('utf-8')).hexdigest()
+    return f'books:{get_version()}:list:{url_hash}'
+
+
+def detail_key(pk):
+    return f'books:{get_version()}:detail:{pk}'
+
+
+def get_cached(key):
+    return cache.get(key)
+
+
+def set_cached(key, data):
+    cache.set(key, data, timeout=settings.BOOKS_CACHE_TIMEOUT)
+
+
+def _bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        get_version()
+
+
+def invalidate():
+    """
+    Invalidate every cached book payload once the current transaction commits.
+
+    Waiting for the commit keeps a concurrent reader from caching the old rows again in between.
+    """
+    transaction.on_commit(_bump_version)
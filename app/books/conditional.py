@@ -0,0 +1,61 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def _make_etag(*parts):
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return quote_etag(digest)
+
+
+def list_etag(queryset, request):
+    """
+    Compute the ETag of a book list page with a single aggregate query.
+
+    Any insert or update moves the latest ``updated_at`` and any delete lowers the row count, so the ETag changes
+    whenever the listed books could have. The request URL is mixed in because each page has its own representation.
+    Lists carry no Last-Modified: a delete leaves the latest ``updated_at`` unchanged, so If-Modified-Since would
+    keep serving the deleted book.
+    """
+    state = queryset.aggregate(last_modified=Max('updated_at'), count=Count('id'))
+    last_modified = state['last_modified']
+    return _make_etag(request.build_absolute_uri(), last_modified and last_modified.isoformat(), state['count'])
+
+
+def detail_validators(book):
+    """
+    Compute the ETag and Last-Modified timestamp of a single book.
+    """
+    return _make_etag(book.pk, book.updated_at.isoformat()), int(book.updated_at.timestamp())
+
+
+def not_modified(request, etag, last_modified):
+    """
+    Return a ``304 Not Modified`` response if the request's conditional headers match, otherwise ``None``.
+    """
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def cached_response(request, entry):
+    """
+    Answer a request from a cached ``{'data', 'etag', 'last_modified'}`` entry without touching the database.
+    """
+    etag, last_modified = entry['etag'], entry['last_modified']
+    response = not_modified(request, etag, last_modified)
+    if response is None:
+        response = set_validators(Response(entry['data'], status=status.HTTP_200_OK), etag, last_modified)
+    return response
@@ -0,0 +1,92 @@
+import csv
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core.models import ArchivedBorrowRecord, Book, BorrowRecord
+
+EXPORT_CHUNK_SIZE = 2000
+
+DATASETS = {
+    'books': (Book, ('id', 'title', 'author', 'total_copies', 'available_copies', 'updated_at')),
+    'borrow_records': (BorrowRecord, ('id', 'book_id', 'member_id', 'borrowed_at', 'due_date', 'returned_at')),
+    'archived_borrow_records': (ArchivedBorrowRecord, ('id', 'book_id', 'member_id', 'borrowed_at', 'due_date',
+                                                       'returned_at', 'archived_at')),
+}
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+
+class _Echo:
+    """
+    File-like object whose ``write`` returns the value, so ``csv.writer`` can format rows without a buffer.
+    """
+    def write(self, value):
+        return value
+
+
+def iter_rows(dataset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield plain value tuples for a dataset in primary key order.
+
+    ``iterator()`` reads through a PostgreSQL server-side cursor ``chunk_size`` rows at a time, and ``values_list``
+    skips model instantiation, so memory use does not depend on the size of the table.
+    """
+    model, fields = DATASETS[dataset]
+    return model.objects.order_by('id').values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+def render_csv(fields, rows, batch_size=EXPORT_CHUNK_SIZE):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields).encode('utf-8')
+    batch = []
+    for row in rows:
+        batch.append(writer.writerow(row))
+        if len(batch) >= batch_size:
+            yield ''.join(batch).encode('utf-8')
+            batch = []
+    if batch:
+        yield ''.join(batch).encode('utf-8')
+
+
+def render_ndjson(fields, rows, batch_size=EXPORT_CHUNK_SIZE):
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    batch = []
+    for row in rows:
+        batch.append(encoder.encode(dict(zip(fields, row))) + '\n')
+        if len(batch) >= batch_size:
+            yield ''.join(batch).encode('utf-8')
+            batch = []
+    if batch:
+        yield ''.join(batch).encode('utf-8')
+
+
+def gzip_chunks(chunks):
+    """
+    Gzip-compress a stream of byte chunks incrementally.
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export(dataset, file_format, compress=False, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Return an iterator of byte chunks with the whole dataset rendered as CSV or NDJSON, optionally gzipped.
+    """
+    fields = DATASETS[dataset][1]
+    renderer = render_csv if file_format == 'csv' else render_ndjson
+    chunks = renderer(fields, iter_rows(dataset, chunk_size), batch_size=chunk_size)
+    return gzip_chunks(chunks) if compress else chunks
+
+
+def get_filename(dataset, file_format, compress=False):
+    extension = FORMATS[file_format][1]
+    return f'{dataset}.{extension}.gz' if compress else f'{dataset}.{extension}'
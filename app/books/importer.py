@@ -0,0 +1,166 @@
+import codecs
+import csv
+import json
+from itertools import islice
+
+from django.db import transaction
+from rest_framework import serializers
+
+from borrow import holds
+from core.models import Book
+
+from .serializers import BookSerializer
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+CSV_CONTENT_TYPE = 'text/csv'
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/jsonl')
+
+
+class UnreadableUploadError(ValueError):
+    """
+    Raised when an upload is not valid UTF-8 or not well-formed CSV. Rows before the error have been yielded.
+    """
+
+
+class BookImportSerializer(BookSerializer):
+    """
+    BookSerializer without the per-row unique_together query; duplicates are resolved by the upsert instead.
+    """
+    class Meta(BookSerializer.Meta):
+        validators = []
+
+
+def iter_csv_rows(stream):
+    """
+    Yield one dict per CSV record, reading the stream line by line. The first line must be the header.
+    """
+    reader = csv.DictReader(codecs.iterdecode(stream, 'utf-8-sig'))
+    try:
+        yield from reader
+    except UnicodeDecodeError:
+        raise UnreadableUploadError(f'Line {reader.reader.line_num + 1} is not valid UTF-8.')
+    except csv.Error as e:
+        raise UnreadableUploadError(f'Line {reader.reader.line_num} is not valid CSV: {e}.')
+
+
+def iter_ndjson_rows(stream):
+    """
+    Yield one parsed JSON value per non-empty line; undecodable lines are yielded as ``None``.
+    """
+    line_number = 0
+    try:
+        for line_number, line in enumerate(codecs.iterdecode(stream, 'utf-8-sig'), 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+    except UnicodeDecodeError:
+        raise UnreadableUploadError(f'Line {line_number + 1} is not valid UTF-8.')
+
+
+def iter_chunks(rows, chunk_size):
+    """
+    Yield the rows in lists of up to ``chunk_size``. When the upload cannot be read to the end, the rows read
+    before the error are yielded first and the UnreadableUploadError is raised on the next iteration.
+    """
+    rows = iter(rows)
+    while True:
+        chunk = []
+        try:
+            for row in islice(rows, chunk_size):
+                chunk.append(row)
+        except UnreadableUploadError:
+            if chunk:
+                yield chunk
+            raise
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_books(rows, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Validate and upsert books from an iterable of row dicts, one chunk at a time.
+
+    Rows are matched to existing books on ``(title, author)``. For an existing book the new ``total_copies`` is
+    applied while keeping currently borrowed copies out of ``available_copies``.
+
+    Returns a report with created/updated counts and per-row validation errors (1-based row numbers).
+    Raises UnreadableUploadError, once the rows before it are written, if the upload cannot be read to the end.
+    """
+    child = BookImportSerializer()
+    report = {'processed': 0, 'created': 0, 'updated': 0, 'errors': [], 'errors_truncated': False}
+    row_number = 0
+
+    for chunk in iter_chunks(rows, chunk_size):
+        valid = {}
+        for row in chunk:
+            row_number += 1
+            try:
+                if row is None:
+                    raise serializers.ValidationError({'non_field_errors': ['Invalid JSON.']})
+                data = child.run_validation(row)
+            except serializers.ValidationError as exc:
+                _report_error(report, row_number, exc.detail)
+                continue
+            # A later row for the same book wins, as it would have with sequential requests.
+            valid[(data['title'], data['author'])] = data
+
+        created, updated = _upsert_chunk(valid)
+        report['processed'] += len(chunk)
+        report['created'] += created
+        report['updated'] += updated
+
+    return report
+
+
+def _report_error(report, row_number, detail):
+    if len(report['errors']) >= MAX_REPORTED_ERRORS:
+        report['errors_truncated'] = True
+        return
+    report['errors'].append({'row': row_number, 'errors': detail})
+
+
+def _upsert_chunk(valid):
+    """
+    Write one chunk of validated rows with a single ``INSERT ... ON CONFLICT (title, author) DO UPDATE``.
+    """
+    if not valid:
+        return 0, 0
+
+    with transaction.atomic():
+        titles = {title for title, _ in valid}
+        # Locked in id order, like the borrow and return paths, so a concurrent batch cannot deadlock with the import.
+        existing = {
+            (book.title, book.author): book
+            for book in Book.objects.select_for_update().filter(title__in=titles).order_by('id')
+            if (book.title, book.author) in valid
+        }
+
+        books_by_key = {}
+        for key, data in valid.items():
+            total = data['total_copies']
+            current = existing.get(key)
+            if current is None:
+                available = total
+            else:
+                borrowed = current.total_copies - current.available_copies
+                total = max(total, borrowed)
+                available = total - borrowed
+            books_by_key[key] = Book(title=key[0], author=key[1], total_copies=total, available_copies=available)
+
+        Book.objects.bulk_create(
+            list(books_by_key.values()),
+            update_conflicts=True,
+            unique_fields=['title', 'author'],
+            update_fields=['total_copies', 'available_copies', 'updated_at'],
+        )
+        # Copies added to existing books go to the members waiting for them first.
+        holds.serve_holds([current.id for key, current in existing.items()
+                           if books_by_key[key].available_copies > current.available_copies])
+
+    return len(valid) - len(existing), len(existing)
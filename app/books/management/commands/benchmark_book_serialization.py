@@ -0,0 +1,49 @@
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from books.serializers import BookReadSerializer, BookSerializer
+from core.models import Book
+
+
+class Command(BaseCommand):
+    help = ('Compare the BookSerializer list path with the .values() fast read path on the same rows. '
+            'Synthetic books are created inside a transaction that is rolled back afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Books per serialized page.')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per path; the best one is reported.')
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+
+        with transaction.atomic():
+            Book.objects.bulk_create(
+                Book(title=f'Benchmark book {i:07d}', author=f'Benchmark author {i % 97}',
+                     total_copies=i % 9 + 1, available_copies=i % 9 + 1)
+                for i in range(rows)
+            )
+            queryset = Book.objects.filter(title__startswith='Benchmark book ').order_by('title', 'id')[:rows]
+            read_serializer = BookReadSerializer()
+            renderer = JSONRenderer()
+
+            def serializer_path():
+                return renderer.render(BookSerializer(queryset.all(), many=True).data)
+
+            def values_path():
+                return renderer.render(read_serializer.to_representation(queryset.values(*read_serializer.fields)))
+
+            if serializer_path() != values_path():
+                raise CommandError('The two paths produced different output.')
+
+            serializer_time = min(timeit.repeat(serializer_path, number=1, repeat=repeat))
+            values_time = min(timeit.repeat(values_path, number=1, repeat=repeat))
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'Rows per page:          {rows}')
+        self.stdout.write(f'BookSerializer path:    {serializer_time * 1000:.2f} ms')
+        self.stdout.write(f'.values() fast path:    {values_time * 1000:.2f} ms')
+        self.stdout.write(self.style.SUCCESS(f'Speed-up:               {serializer_time / values_time:.1f}x '
+                                             f'(identical output)'))
@@ -0,0 +1,30 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from books import exporter
+
+
+class Command(BaseCommand):
+    help = 'Stream the book catalog (or borrow records) to a CSV or NDJSON file with constant memory use.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', choices=list(exporter.DATASETS), default='books')
+        parser.add_argument('--format', dest='file_format', choices=list(exporter.FORMATS), default='csv')
+        parser.add_argument('--gzip', action='store_true', help='Gzip-compress the output.')
+        parser.add_argument('--output', help='File to write to. Defaults to standard output.')
+        parser.add_argument('--chunk-size', type=int, default=exporter.EXPORT_CHUNK_SIZE,
+                            help='Rows fetched from the server-side cursor per round trip.')
+
+    def handle(self, *args, **options):
+        chunks = exporter.export(options['dataset'], options['file_format'], options['gzip'], options['chunk_size'])
+
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f'Exported {options["dataset"]} to {options["output"]}'))
+        else:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
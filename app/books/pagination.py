@@ -0,0 +1,17 @@
+from core.pagination import KeysetPagination
+
+
+class BookCursorPagination(KeysetPagination):
+    """
+    Keyset pagination for the book catalog, following ``Book.Meta.ordering`` with ``id`` as the tie-breaker.
+    """
+    ordering = ('title', 'id')
+    page_size = 50
+    max_page_size = 200
+
+
+class BookSearchPagination(BookCursorPagination):
+    """
+    Keyset pagination for search results, best match first.
+    """
+    ordering = ('-rank', 'id')
@@ -0,0 +1,33 @@
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector,
+                                            TrigramWordSimilarity)
+from django.db.models import FloatField, Q
+from django.db.models.functions import Cast, Greatest
+
+# Catalog entries mix languages and proper names, so no stemming or stop words.
+SEARCH_CONFIG = 'simple'
+
+# Must stay identical to the expression indexed by ``book_search_vector_idx``, otherwise the index is not used.
+BOOK_SEARCH_VECTOR = SearchVector('title', 'author', config=SEARCH_CONFIG)
+
+
+def search_books(queryset, query):
+    """
+    Filter books matching the query by full-text search or by trigram word similarity on title and author,
+    so that misspelled words still match.
+
+    Every matching row is annotated with a ``rank`` combining the text-search rank and the best trigram word
+    similarity.
+    The rank is cast to double precision so that it survives a round trip through a pagination cursor unchanged.
+    """
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+    rank = SearchRank(BOOK_SEARCH_VECTOR, search_query) + Greatest(
+        TrigramWordSimilarity(query, 'title'),
+        TrigramWordSimilarity(query, 'author'),
+    )
+    return queryset.annotate(
+        search=BOOK_SEARCH_VECTOR,
+        rank=Cast(rank, FloatField()),
+    ).filter(
+        Q(search=search_query) | Q(title__trigram_word_similar=query) | Q(author__trigram_word_similar=query)
+    )
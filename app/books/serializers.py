@@ -18,3 +18,41 @@ class BookSerializer(serializers.ModelSerializer):
         """
         validated_data['available_copies'] = validated_data['total_copies']
         return super().create(validated_data)
+
+
+class BookReadSerializer:
+    """
+    Read-only counterpart of BookSerializer for large lists.
+
+    Rows are fetched with ``.values()`` and turned into dicts through a field mapping compiled once per request,
+    skipping model instantiation and per-field DRF introspection. The output is identical to BookSerializer's,
+    restricted to the requested ``fields`` (in BookSerializer's field order).
+    """
+    all_fields = tuple(BookSerializer.Meta.fields)
+
+    def __init__(self, fields=None):
+        requested = set(fields or self.all_fields)
+        unknown = requested.difference(self.all_fields)
+        if unknown:
+            raise serializers.ValidationError(
+                {'fields': f'Unknown field(s): {", ".join(sorted(unknown))}. '
+                           f'Choose from: {", ".join(self.all_fields)}.'})
+        self.fields = tuple(field for field in self.all_fields if field in requested)
+
+    def get_columns(self, extra=()):
+        """
+        Return the columns to select: the requested fields plus any extra ones, such as pagination keys.
+        """
+        return self.fields + tuple(column for column in extra if column not in self.fields)
+
+    def to_representation(self, rows):
+        fields = self.fields
+        return [{field: row[field] for field in fields} for row in rows]
+
+    @classmethod
+    def from_query_param(cls, value):
+        """
+        Build a serializer from a comma-separated ``fields`` query parameter.
+        """
+        fields = [field.strip() for field in (value or '').split(',') if field.strip()]
+        return cls(fields)
@@ -1,9 +1,13 @@
+from io import StringIO
 from unittest.mock import patch
 
+from django.core.management import call_command
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 
+from books.serializers import BookSerializer
 from core.models import Book, User
 from user.tests.test_user_api import UserApiTestsBase
 
@@ -65,3 +69,137 @@ class BooksApiTests(BooksApiTestsBase):
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.get_token()}')
         response = self.get_books()
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class BooksPaginationApiTests(BooksApiTestsBase):
+    """Tests for keyset pagination of the book list."""
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate()
+
+    def test_pages_follow_title_then_id(self):
+        """Ensure walking the next links returns every book once, in title order."""
+        for title, author in [('B', 'x'), ('A', 'y'), ('B', 'z'), ('C', 'x'), ('A', 'x')]:
+            Book.objects.create(title=title, author=author, total_copies=1, available_copies=1)
+        expected = list(Book.objects.order_by('title', 'id').values_list('id', flat=True))
+
+        seen = []
+        response = self.client.get(self.books_url, {'page_size': 2})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen.extend(book['id'] for book in response.data['results'])
+            if response.data['next'] is None:
+                break
+            response = self.client.get(response.data['next'])
+
+        self.assertEqual(seen, expected)
+
+    def test_page_size_is_capped(self):
+        """Ensure page_size cannot exceed the maximum page size."""
+        Book.objects.bulk_create(
+            Book(title=f'Book {i}', author='Author', total_copies=1, available_copies=1) for i in range(205)
+        )
+        response = self.client.get(self.books_url, {'page_size': 1000})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 200)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_invalid_cursor(self):
+        """Ensure a malformed cursor is rejected."""
+        response = self.client.get(self.books_url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('cursor', response.data)
+
+
+class BooksSearchApiTests(BooksApiTestsBase):
+    """Tests for searching the book list."""
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate()
+
+        Book.objects.create(title='The Hobbit', author='J. R. R. Tolkien', total_copies=1, available_copies=1)
+        Book.objects.create(title='The Silmarillion', author='J. R. R. Tolkien', total_copies=1, available_copies=1)
+        Book.objects.create(title='Dune', author='Frank Herbert', total_copies=1, available_copies=1)
+
+    def test_search_by_title(self):
+        """Ensure a title search returns only the matching book."""
+        response = self.client.get(self.books_url, {'q': 'hobbit'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([book['title'] for book in response.data['results']], ['The Hobbit'])
+
+    def test_search_by_author(self):
+        """Ensure an author search returns all of their books."""
+        response = self.client.get(self.books_url, {'q': 'Tolkien'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({book['title'] for book in response.data['results']}, {'The Hobbit', 'The Silmarillion'})
+
+    def test_search_tolerates_typos(self):
+        """Ensure a misspelled word still finds the book."""
+        response = self.client.get(self.books_url, {'q': 'hobit'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([book['title'] for book in response.data['results']], ['The Hobbit'])
+
+    def test_search_results_are_ranked_and_paginated(self):
+        """Ensure the best match comes first and search results can be paged through."""
+        response = self.client.get(self.books_url, {'q': 'hobbit tolkien', 'page_size': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['title'], 'The Hobbit')
+
+        titles = [book['title'] for book in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            titles.extend(book['title'] for book in response.data['results'])
+        self.assertEqual(len(titles), len(set(titles)))
+
+    def test_search_no_match(self):
+        """Ensure an unrelated query returns an empty page."""
+        response = self.client.get(self.books_url, {'q': 'zzzzqqq'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
+        self.assertIsNone(response.data['next'])
+
+
+class BooksSparseFieldsApiTests(BooksApiTestsBase):
+    """Tests for sparse fieldsets and the fast read path of the book list."""
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate()
+        for i in range(3):
+            Book.objects.create(title=f'Book {i}', author=f'Author {i}', total_copies=i + 1, available_copies=i + 1)
+
+    def test_default_output_matches_book_serializer(self):
+        """Ensure the fast read path renders exactly what BookSerializer would."""
+        response = self.client.get(self.books_url)
+        expected = BookSerializer(Book.objects.order_by('title', 'id'), many=True).data
+        self.assertEqual(JSONRenderer().render(response.data['results']), JSONRenderer().render(expected))
+
+    def test_sparse_fields(self):
+        """Ensure only the requested fields are returned, in the serializer's field order."""
+        response = self.client.get(self.books_url, {'fields': 'title,id'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data['results'][0]), ['id', 'title'])
+
+    def test_sparse_fields_keep_pagination(self):
+        """Ensure pages can be walked even when the ordering fields are not requested."""
+        response = self.client.get(self.books_url, {'fields': 'author', 'page_size': 2})
+        authors = [book['author'] for book in response.data['results']]
+        response = self.client.get(response.data['next'])
+        authors.extend(book['author'] for book in response.data['results'])
+        self.assertEqual(authors, ['Author 0', 'Author 1', 'Author 2'])
+
+    def test_unknown_field(self):
+        """Ensure unknown fields are rejected."""
+        response = self.client.get(self.books_url, {'fields': 'id,password'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', response.data)
+
+    def test_benchmark_command(self):
+        """Ensure the serialization benchmark runs and leaves no rows behind."""
+        out = StringIO()
+        call_command('benchmark_book_serialization', '--rows', '10', '--repeat', '1', stdout=out)
+        self.assertIn('identical output', out.getvalue())
+        self.assertEqual(Book.objects.count(), 3)
@@ -0,0 +1,152 @@
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework import status
+
+from core.models import Book, User
+
+from .test_book_api import BooksApiTestsBase
+
+
+class BookCacheTests(BooksApiTestsBase):
+    """Tests for the book read cache and its invalidation."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.authenticate()
+        self.book = Book.objects.create(title='Test Book', author='Test Author', total_copies=5, available_copies=5)
+        self.detail_url = reverse('books:book-detail', args=[self.book.id])
+
+    def test_list_served_from_cache(self):
+        """Ensure a repeated list request is served, authentication included, without any query."""
+        first = self.client.get(self.books_url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.books_url)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data, second.data)
+
+    def test_detail_served_from_cache(self):
+        """Ensure a repeated detail request is served, authentication included, without any query."""
+        self.client.get(self.detail_url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.detail_url)
+        self.assertEqual(response.data['title'], 'Test Book')
+
+    def test_create_invalidates_list(self):
+        """Ensure a newly added book shows up in a previously cached list."""
+        self.client.get(self.books_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_book(title='Another Book')
+
+        response = self.client.get(self.books_url)
+        self.assertEqual([book['title'] for book in response.data['results']], ['Another Book', 'Test Book'])
+
+    def test_update_invalidates_detail(self):
+        """Ensure a patched book is not served stale from the cache."""
+        self.client.get(self.detail_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(self.detail_url, {'title': 'Updated Title'}, format='json')
+
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.data['title'], 'Updated Title')
+
+    def test_delete_invalidates_detail(self):
+        """Ensure a deleted book is no longer served from the cache."""
+        self.client.get(self.detail_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(self.detail_url)
+
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @patch('borrow.tasks.send_notification_email.delay')
+    def test_borrow_and_return_invalidate_detail(self, mock_send_notification_email):
+        """Ensure available copies are refreshed after a borrow and a return."""
+        self.user.user_type = User.VISITOR_USER
+        self.user.save()
+        self.client.get(self.detail_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('borrow:borrow-book', kwargs={'pk': self.book.id}))
+        self.assertEqual(self.client.get(self.detail_url).data['available_copies'], 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('borrow:return-book', kwargs={'pk': self.book.id}))
+        self.assertEqual(self.client.get(self.detail_url).data['available_copies'], 5)
+
+
+class BookConditionalGetTests(BooksApiTestsBase):
+    """Tests for ETag / Last-Modified conditional requests."""
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate()
+        self.book = Book.objects.create(title='Test Book', author='Test Author', total_copies=5, available_copies=5)
+        self.detail_url = reverse('books:book-detail', args=[self.book.id])
+
+    def test_list_not_modified(self):
+        """Ensure a list request with a matching ETag gets 304 and no body."""
+        response = self.client.get(self.books_url)
+        self.assertIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+
+        response = self.client.get(self.books_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_list_not_modified_without_cache(self):
+        """Ensure the 304 is computed from the aggregate query alone when the page is not cached."""
+        etag = self.client.get(self.books_url)['ETag']
+        cache.clear()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.books_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_modified_after_change(self):
+        """Ensure a changed catalog produces a new ETag and a full response."""
+        etag = self.client.get(self.books_url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_book(title='Another Book')
+
+        response = self.client.get(self.books_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_modified_after_delete(self):
+        """Ensure If-Modified-Since cannot make a client keep a deleted book, since lists carry no Last-Modified."""
+        self.add_book(title='Another Book')
+        since = http_date(time.time() + 60)
+        self.assertEqual(self.client.get(self.books_url, HTTP_IF_MODIFIED_SINCE=since).status_code,
+                         status.HTTP_200_OK)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(self.detail_url)
+        response = self.client.get(self.books_url, HTTP_IF_MODIFIED_SINCE=since)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([book['title'] for book in response.data['results']], ['Another Book'])
+
+    def test_detail_not_modified(self):
+        """Ensure a detail request with a matching ETag or a recent If-Modified-Since gets 304."""
+        response = self.client.get(self.detail_url)
+
+        by_etag = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(by_etag.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(by_etag['ETag'], response['ETag'])
+
+        by_date = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(by_date.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_modified_after_update(self):
+        """Ensure a patched book no longer matches its old ETag."""
+        etag = self.client.get(self.detail_url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(self.detail_url, {'title': 'Updated Title'}, format='json')
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], 'Updated Title')
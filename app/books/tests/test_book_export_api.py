@@ -0,0 +1,89 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from core.models import Book, BorrowRecord
+
+from .test_book_api import BooksApiTestsBase
+
+
+class BookExportApiTests(BooksApiTestsBase):
+    """Tests for the streaming catalog export."""
+
+    def setUp(self):
+        super().setUp()
+        self.export_url = reverse('books:books-export')
+        self.books = [
+            Book.objects.create(title=f'Book {i}', author='Author', total_copies=3, available_copies=3)
+            for i in range(5)
+        ]
+
+    def read(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_export_csv(self):
+        """Ensure every book is streamed as CSV in id order."""
+        self.authenticate()
+        response = self.client.get(self.export_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('books.csv', response['Content-Disposition'])
+
+        rows = list(csv.DictReader(io.StringIO(self.read(response).decode('utf-8'))))
+        self.assertEqual([int(row['id']) for row in rows], [book.id for book in self.books])
+        self.assertEqual(rows[0]['title'], 'Book 0')
+
+    def test_export_ndjson_gzip(self):
+        """Ensure the NDJSON export can be gzip-compressed."""
+        self.authenticate()
+        response = self.client.get(self.export_url, {'file_format': 'ndjson', 'gzip': '1'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        lines = gzip.decompress(self.read(response)).decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(json.loads(lines[0])['title'], 'Book 0')
+
+    def test_export_borrow_records(self):
+        """Ensure borrow records can be exported."""
+        user = self.authenticate()
+        BorrowRecord.objects.create(book=self.books[0], member=user)
+
+        response = self.client.get(self.export_url, {'dataset': 'borrow_records', 'file_format': 'ndjson'})
+
+        record = json.loads(self.read(response).decode('utf-8'))
+        self.assertEqual(record['book_id'], self.books[0].id)
+        self.assertEqual(record['member_id'], user.id)
+
+    def test_export_invalid_options(self):
+        """Ensure unknown datasets and formats are rejected."""
+        self.authenticate()
+        self.assertEqual(self.client.get(self.export_url, {'dataset': 'users'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.export_url, {'file_format': 'xml'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+    def test_export_forbidden_for_visitors(self):
+        """Ensure visitors cannot export the catalog."""
+        self.authenticate(user_type=1)
+        response = self.client.get(self.export_url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_command(self):
+        """Ensure the management command writes the same dump to a file."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'books.csv.gz')
+            call_command('export_catalog', '--gzip', '--output', path, '--chunk-size', '2', stderr=io.StringIO())
+            with gzip.open(path, 'rt') as dump:
+                rows = list(csv.DictReader(dump))
+
+        self.assertEqual([row['title'] for row in rows], [f'Book {i}' for i in range(5)])
@@ -0,0 +1,132 @@
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from books import importer
+from core.models import Book
+
+from .test_book_api import BooksApiTestsBase
+
+
+class BookImportApiTests(BooksApiTestsBase):
+    """Tests for the bulk book import API."""
+
+    def setUp(self):
+        super().setUp()
+        self.import_url = reverse('books:books-import')
+
+    def post_import(self, body, content_type):
+        return self.client.post(self.import_url, data=body, content_type=content_type)
+
+    def test_import_csv(self):
+        """Ensure CSV rows are created, existing books updated and bad rows reported."""
+        self.authenticate()
+        Book.objects.create(title='Dune', author='Frank Herbert', total_copies=5, available_copies=3)
+        body = (
+            'title,author,total_copies\n'
+            'Dune,Frank Herbert,10\n'
+            'The Hobbit,J. R. R. Tolkien,4\n'
+            'Broken,Nobody,many\n'
+        )
+
+        response = self.post_import(body, 'text/csv')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['processed'], 3)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(len(response.data['errors']), 1)
+        self.assertEqual(response.data['errors'][0]['row'], 3)
+        self.assertIn('total_copies', response.data['errors'][0]['errors'])
+
+        dune = Book.objects.get(title='Dune')
+        self.assertEqual((dune.total_copies, dune.available_copies), (10, 8))
+        hobbit = Book.objects.get(title='The Hobbit')
+        self.assertEqual((hobbit.total_copies, hobbit.available_copies), (4, 4))
+
+    def test_import_ndjson(self):
+        """Ensure NDJSON lines are imported and invalid JSON is reported per row."""
+        self.authenticate()
+        lines = [
+            json.dumps({'title': 'Dune', 'author': 'Frank Herbert', 'total_copies': 2}),
+            '{not json',
+            '',
+            json.dumps({'title': 'Emma', 'author': 'Jane Austen', 'total_copies': 1}),
+        ]
+
+        response = self.post_import('\n'.join(lines), 'application/x-ndjson')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2])
+        self.assertEqual(Book.objects.count(), 2)
+
+    def test_import_keeps_borrowed_copies(self):
+        """Ensure lowering total copies never drops below the copies currently borrowed."""
+        self.authenticate()
+        Book.objects.create(title='Dune', author='Frank Herbert', total_copies=5, available_copies=1)
+
+        self.post_import('title,author,total_copies\nDune,Frank Herbert,2\n', 'text/csv')
+
+        dune = Book.objects.get(title='Dune')
+        self.assertEqual((dune.total_copies, dune.available_copies), (4, 0))
+
+    def test_import_in_chunks(self):
+        """Ensure duplicates across and within chunks are upserted into a single book."""
+        self.authenticate()
+        rows = [{'title': f'Book {i % 7}', 'author': 'Author', 'total_copies': i} for i in range(1, 26)]
+
+        report = importer.import_books(rows, chunk_size=4)
+
+        self.assertEqual(report['processed'], 25)
+        self.assertEqual(report['errors'], [])
+        self.assertEqual(Book.objects.count(), 7)
+        self.assertEqual(Book.objects.get(title='Book 4').total_copies, 25)
+
+    def test_import_locks_books_in_id_order(self):
+        """Ensure existing books are locked in id order, as the borrow and return paths lock them."""
+        Book.objects.create(title='Dune', author='Frank Herbert', total_copies=1, available_copies=1)
+        Book.objects.create(title='Emma', author='Jane Austen', total_copies=1, available_copies=1)
+
+        with CaptureQueriesContext(connection) as queries:
+            importer.import_books([{'title': 'Emma', 'author': 'Jane Austen', 'total_copies': 2},
+                                   {'title': 'Dune', 'author': 'Frank Herbert', 'total_copies': 2}])
+
+        locks = [query['sql'] for query in queries.captured_queries if 'FOR UPDATE' in query['sql']]
+        self.assertEqual(len(locks), 1)
+        self.assertIn('ORDER BY "core_book"."id" ASC', locks[0])
+
+    def test_import_forbidden_for_visitors(self):
+        """Ensure visitors cannot import books."""
+        self.authenticate(user_type=1)
+        response = self.post_import('title,author,total_copies\nDune,Frank Herbert,2\n', 'text/csv')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Book.objects.count(), 0)
+
+    def test_import_unsupported_content_type(self):
+        """Ensure uploads in other formats are rejected."""
+        self.authenticate()
+        response = self.post_import('{}', 'application/json')
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    def test_import_unreadable_upload(self):
+        """Ensure an upload that is not UTF-8 or not CSV is rejected at its first bad line, keeping earlier rows."""
+        self.authenticate()
+        body = 'title,author,total_copies\nDune,Frank Herbert,2\n'.encode() + 'Émile,Rousseau,1\n'.encode('latin-1')
+
+        response = self.post_import(body, 'text/csv')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Line 3 is not valid UTF-8.', response.data['detail'])
+        self.assertEqual(list(Book.objects.values_list('title', flat=True)), ['Dune'])
+
+        response = self.post_import(b'{"title": "\xe9"}\n', 'application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Line 1 is not valid UTF-8.', response.data['detail'])
+
+        response = self.post_import(f'title,author,total_copies\n{"x" * 200000},Nobody,1\n', 'text/csv')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Line 2 is not valid CSV', response.data['detail'])
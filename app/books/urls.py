@@ -1,6 +1,6 @@
 from django.urls import path
 
-from .views import BookDetailView, BooksView
+from .views import BookDetailView, BookExportView, BookImportView, BooksView
 
 app_name = 'books'
 
@@ -10,5 +10,7 @@ URL patterns for books-related operations.
 
 urlpatterns = [
     path('books/', BooksView.as_view(), name='books-info'),
+    path('books/import/', BookImportView.as_view(), name='books-import'),
+    path('books/export/', BookExportView.as_view(), name='books-export'),
     path('book/<int:pk>/', BookDetailView.as_view(), name='book-detail'),
 ]
@@ -1,11 +1,18 @@
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from borrow import holds
 from core.models import Book
 
-from .serializers import BookSerializer
+from . import cache as book_cache
+from . import conditional, exporter, importer
+from .pagination import BookCursorPagination, BookSearchPagination
+from .search import search_books
+from .serializers import BookReadSerializer, BookSerializer
 
 
 class BooksView(APIView):
@@ -27,16 +34,43 @@ class BooksView(APIView):
         serializer = BookSerializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
+            book_cache.invalidate()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def get(self, request):
         """
-        List all books.
+        List books one page at a time, ordered by title.
+        Pass the opaque ``next`` link (``?cursor=``) to fetch the following page and ``page_size`` to resize it.
+        With ``?q=`` only books whose title or author match are returned, best match first.
+        ``?fields=id,title`` limits each book to the listed fields.
+        Pages are served from the book cache when possible and carry an ETag; an unchanged page is answered with
+        304 Not Modified.
         """
-        books = Book.objects.all()
-        serializer = BookSerializer(books, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        cache_key = book_cache.list_key(request)
+        entry = book_cache.get_cached(cache_key)
+        if entry is not None:
+            return conditional.cached_response(request, entry)
+
+        serializer = BookReadSerializer.from_query_param(request.query_params.get('fields'))
+        query = request.query_params.get('q', '').strip()
+        if query:
+            paginator = BookSearchPagination()
+            books = search_books(Book.objects.all(), query)
+        else:
+            paginator = BookCursorPagination()
+            books = Book.objects.all()
+
+        etag = conditional.list_etag(books, request)
+        response = conditional.not_modified(request, etag, None)
+        if response is not None:
+            return response
+
+        pagination_keys = [field.lstrip('-') for field in paginator.ordering]
+        rows = paginator.paginate_queryset(books.values(*serializer.get_columns(pagination_keys)), request)
+        response = paginator.get_paginated_response(serializer.to_representation(rows))
+        book_cache.set_cached(cache_key, {'data': response.data, 'etag': etag, 'last_modified': None})
+        return conditional.set_validators(response, etag, None)
 
 
 class BookDetailView(APIView):
@@ -47,15 +81,27 @@ class BookDetailView(APIView):
 
     def get(self, request, pk):
         """
-        Retrieve a specific book by ID.
+        Retrieve a specific book by ID, from the book cache when possible.
+        Responses carry ETag/Last-Modified validators; an unchanged book is answered with 304 Not Modified.
         """
+        cache_key = book_cache.detail_key(pk)
+        entry = book_cache.get_cached(cache_key)
+        if entry is not None:
+            return conditional.cached_response(request, entry)
+
         try:
             book = Book.objects.get(pk=pk)
         except Book.DoesNotExist:
             return Response({"message": "Book not found"}, status=status.HTTP_404_NOT_FOUND)
 
+        etag, last_modified = conditional.detail_validators(book)
+        response = conditional.not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
         serializer = BookSerializer(book)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        book_cache.set_cached(cache_key, {'data': serializer.data, 'etag': etag, 'last_modified': last_modified})
+        return conditional.set_validators(Response(serializer.data, status=status.HTTP_200_OK), etag, last_modified)
 
     def patch(self, request, pk):
         """
@@ -67,30 +113,36 @@ class BookDetailView(APIView):
             return Response({'detail': 'You do not have permission to update books.'},
                             status=status.HTTP_403_FORBIDDEN)
 
-        try:
-            book = Book.objects.get(pk=pk)
-        except Book.DoesNotExist:
-            return Response({"message": "Book not found"}, status=status.HTTP_404_NOT_FOUND)
-
         data = request.data
         total_copies = data.get('total_copies')
 
-        if total_copies is not None:
-            if total_copies < book.available_copies:
-                book.total_copies = book.available_copies
-            elif total_copies > book.total_copies:
-                book.available_copies += (total_copies - book.total_copies)
-                book.total_copies = total_copies
+        with transaction.atomic():
+            try:
+                book = Book.objects.select_for_update().get(pk=pk)
+            except Book.DoesNotExist:
+                return Response({"message": "Book not found"}, status=status.HTTP_404_NOT_FOUND)
+
+            if total_copies is not None:
+                if total_copies < book.available_copies:
+                    book.total_copies = book.available_copies
+                elif total_copies > book.total_copies:
+                    book.available_copies += (total_copies - book.total_copies)
+                    book.total_copies = total_copies
+                else:
+                    book.total_copies = total_copies
             else:
-                book.total_copies = total_copies
-        else:
-            serializer = BookSerializer(book, data=data, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-                return Response(serializer.data, status=status.HTTP_200_OK)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-        book.save()
+                serializer = BookSerializer(book, data=data, partial=True)
+                if serializer.is_valid():
+                    serializer.save()
+                    book_cache.invalidate()
+                    return Response(serializer.data, status=status.HTTP_200_OK)
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+            book.save()
+            # Added copies go to the members waiting for the book before anyone else can borrow them.
+            if holds.serve_holds([book.id]):
+                book.refresh_from_db()
+            book_cache.invalidate()
         return Response(BookSerializer(book).data, status=status.HTTP_200_OK)
 
     def delete(self, request, pk):
@@ -113,4 +165,84 @@ class BookDetailView(APIView):
                             status=status.HTTP_400_BAD_REQUEST)
 
         book.delete()
+        book_cache.invalidate()
         return Response({"message": "Book deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
+
+
+class BookImportView(APIView):
+    """
+    View to bulk-import books from a streamed CSV or NDJSON upload.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        """
+        Create or update books from the request body, which is read line by line and never held in memory.
+        Only accessible by users with LIBRARY_USER type.
+
+        Send ``Content-Type: text/csv`` (header row with title, author, total_copies) or
+        ``Content-Type: application/x-ndjson`` (one JSON object per line).
+        Books are matched on title and author; the response reports created and updated counts and per-row errors.
+        An upload that is not valid UTF-8 or CSV gets a 400 naming the first unreadable line.
+        """
+        user = request.user
+        if user.user_type != user.LIBRARY_USER:
+            return Response({'detail': 'You do not have permission to import books.'},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        content_type = request.content_type.split(';')[0].strip().lower()
+        stream = request.stream or []
+        if content_type == importer.CSV_CONTENT_TYPE:
+            rows = importer.iter_csv_rows(stream)
+        elif content_type in importer.NDJSON_CONTENT_TYPES:
+            rows = importer.iter_ndjson_rows(stream)
+        else:
+            return Response({'detail': 'Upload must be text/csv or application/x-ndjson.'},
+                            status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+        try:
+            report = importer.import_books(rows)
+        except importer.UnreadableUploadError as e:
+            # Chunks before the unreadable line are already written.
+            book_cache.invalidate()
+            return Response({'detail': f'{e} The rows before it were imported.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if report['created'] or report['updated']:
+            book_cache.invalidate()
+        return Response(report, status=status.HTTP_200_OK)
+
+
+class BookExportView(APIView):
+    """
+    View to stream a full catalog dump.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        """
+        Stream every book (or every borrow record) as CSV or NDJSON with constant memory use.
+        Only accessible by users with LIBRARY_USER type.
+
+        Query params: ``dataset`` (books, borrow_records, archived_borrow_records),
+        ``file_format`` (csv, ndjson) and ``gzip`` (1 to compress).
+        """
+        user = request.user
+        if user.user_type != user.LIBRARY_USER:
+            return Response({'detail': 'You do not have permission to export the catalog.'},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        dataset = request.query_params.get('dataset', 'books')
+        file_format = request.query_params.get('file_format', 'csv')
+        compress = request.query_params.get('gzip') in ('1', 'true')
+        if dataset not in exporter.DATASETS:
+            return Response({'detail': f'Unknown dataset. Choose from: {", ".join(exporter.DATASETS)}.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if file_format not in exporter.FORMATS:
+            return Response({'detail': f'Unknown file format. Choose from: {", ".join(exporter.FORMATS)}.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        content_type = 'application/gzip' if compress else exporter.FORMATS[file_format][0]
+        response = StreamingHttpResponse(exporter.export(dataset, file_format, compress), content_type=content_type)
+        filename = exporter.get_filename(dataset, file_format, compress)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
@@ -0,0 +1,70 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+
+from core.models import Book, BookHold, BorrowRecord
+
+from . import notifications
+
+
+def queue_position(hold):
+    """
+    Return the 1-based position of a hold in its book's queue.
+    """
+    ahead = Q(created_at__lt=hold.created_at) | Q(created_at=hold.created_at, id__lt=hold.id)
+    return BookHold.objects.filter(ahead, book_id=hold.book_id).count() + 1
+
+
+def allocate_returned_copy(book_id):
+    """
+    Lend a copy that was just put back on the shelf to the member at the head of the book's hold queue.
+
+    Must run in the transaction that returned or added the copy, after ``available_copies`` was incremented, so the
+    book row is already locked and a hold placed concurrently either sees no available copy or is served here. The
+    served hold is deleted; holds whose member can no longer take the loan (inactive, or already borrowing the book) are
+    dropped on the way. Returns the member the copy was lent to, or ``None`` when nobody is waiting.
+    """
+    holds = (BookHold.objects.select_for_update(skip_locked=True, of=('self',))
+             .select_related('member')
+             .filter(book_id=book_id)
+             .order_by('created_at', 'id'))
+    while True:
+        hold = holds.first()
+        if hold is None:
+            return None
+
+        hold.delete()
+        if not hold.member.is_active:
+            continue
+        try:
+            with transaction.atomic():
+                BorrowRecord.objects.create(book_id=book_id, member=hold.member)
+        except IntegrityError:
+            continue
+
+        Book.objects.filter(pk=book_id).update(available_copies=F('available_copies') - 1)
+        return hold.member
+
+
+def serve_holds(book_ids):
+    """
+    Lend the available copies of books whose stock was just raised, e.g. by a staff edit or a catalog import, to
+    their hold queues, and queue the hold-ready emails.
+
+    Must run in the transaction that raised ``available_copies``, with the book rows locked, like
+    ``allocate_returned_copy``. Returns the number of copies lent.
+    """
+    held = BookHold.objects.filter(book_id__in=book_ids).values('book_id')
+    served = {}
+    lent = 0
+    for book_id, title, available in (Book.objects.filter(id__in=held, available_copies__gt=0).order_by('id')
+                                      .values_list('id', 'title', 'available_copies')):
+        for _ in range(available):
+            member = allocate_returned_copy(book_id)
+            if member is None:
+                break
+            served.setdefault(member.id, (member, []))[1].append(title)
+            lent += 1
+
+    notifications.enqueue(message for member, titles in served.values()
+                          for message in notifications.hold_messages(member, titles))
+    return lent
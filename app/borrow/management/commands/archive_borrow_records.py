@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from borrow import archive
+
+
+class Command(BaseCommand):
+    help = 'Move returned borrow records older than the given number of days to the archive table, in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.BORROW_ARCHIVE_AFTER_DAYS,
+                            help='Archive loans returned more than this many days ago.')
+        parser.add_argument('--batch-size', type=int, default=archive.ARCHIVE_BATCH_SIZE,
+                            help='Records moved per transaction.')
+
+    def handle(self, *args, **options):
+        moved = archive.archive_returned_records(archive.archive_cutoff(days=options['days']), options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Archived {moved} borrow records.'))
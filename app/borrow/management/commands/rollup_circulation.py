@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from borrow import analytics
+
+
+class Command(BaseCommand):
+    help = 'Compute the daily circulation rollups for a range of days, e.g. to backfill them after deployment.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First day to roll up (YYYY-MM-DD). Defaults to yesterday.')
+        parser.add_argument('--end', help='Last day to roll up (YYYY-MM-DD). Defaults to yesterday.')
+
+    def handle(self, *args, **options):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        try:
+            start = parse_date(options['start']) if options['start'] else yesterday
+            end = parse_date(options['end']) if options['end'] else yesterday
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if start is None or end is None:
+            raise CommandError('Dates must be given as YYYY-MM-DD.')
+
+        day = start
+        while day <= end:
+            rows = analytics.rollup_day(day)
+            self.stdout.write(f'{day}: {rows} books')
+            day += timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(f'Rolled up circulation from {start} to {end}.'))
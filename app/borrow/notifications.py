@@ -0,0 +1,135 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+from core.models import NotificationEvent, OutboxMessage
+
+STAFF_EMAILS_KEY = 'borrow:staff-emails'
+
+
+def get_staff_emails():
+    """
+    Return the email addresses of all library staff.
+
+    The list is cached and only reloaded after a User is saved or deleted (see ``borrow.signals``), so the
+    notification paths of borrow and return do not query the user table.
+    """
+    emails = cache.get(STAFF_EMAILS_KEY)
+    if emails is None:
+        User = get_user_model()
+        emails = list(User.objects.filter(user_type=User.LIBRARY_USER).values_list('email', flat=True))
+        cache.set(STAFF_EMAILS_KEY, emails, timeout=settings.STAFF_EMAILS_CACHE_TIMEOUT)
+    return emails
+
+
+def invalidate_staff_emails():
+    """
+    Drop the cached staff email list once the current transaction commits.
+    """
+    transaction.on_commit(lambda: cache.delete(STAFF_EMAILS_KEY))
+
+
+def enqueue(messages):
+    """
+    Store ``(subject, message, from_email, recipient_list)`` emails in the outbox for ``dispatch_outbox`` to send.
+
+    Call it inside the transaction that makes the change being reported: the emails are sent only if it commits,
+    and the request never waits on the message broker. Messages without recipients are skipped.
+    """
+    OutboxMessage.objects.bulk_create(
+        OutboxMessage(subject=subject, message=message, from_email=from_email, recipient_list=recipient_list)
+        for subject, message, from_email, recipient_list in messages if recipient_list
+    )
+
+
+def _join_titles(titles):
+    return ', '.join(f"'{title}'" for title in titles)
+
+
+def member_message(kind, member, titles):
+    """
+    Build the confirmation email sent to the member for one or more borrowed or returned books.
+    """
+    verb = 'borrowed' if kind == NotificationEvent.BORROWED else 'returned'
+    if len(titles) == 1:
+        subject = f'Book {verb.capitalize()}'
+        message = f'You have successfully {verb} the book: {titles[0]}.'
+    else:
+        subject = f'Books {verb.capitalize()}'
+        message = f'You have successfully {verb} the books: {_join_titles(titles)}.'
+    return subject, message, settings.EMAIL_HOST_USER, [member.email]
+
+
+def staff_messages(kind, member, titles):
+    """
+    Build the staff notification for one or more borrowed or returned books.
+
+    In digest mode the events are stored for the periodic ``send_staff_digest`` task instead, and no message is
+    returned.
+    """
+    if settings.STAFF_NOTIFICATION_MODE == 'digest':
+        NotificationEvent.objects.bulk_create(
+            NotificationEvent(kind=kind, book_title=title, member_name=member.name, member_email=member.email)
+            for title in titles
+        )
+        return []
+
+    verb = 'borrowed' if kind == NotificationEvent.BORROWED else 'returned'
+    if len(titles) == 1:
+        subject = f'Book {verb.capitalize()} Notification'
+        message = f"The book '{titles[0]}' was {verb} by {member.name} (Email: {member.email})."
+    else:
+        subject = f'Books {verb.capitalize()} Notification'
+        message = f'The books {_join_titles(titles)} were {verb} by {member.name} (Email: {member.email}).'
+    return [(subject, message, settings.EMAIL_HOST_USER, get_staff_emails())]
+
+
+def borrowed_messages(member, titles):
+    """
+    Build every email to send after a member borrowed one or more books.
+    """
+    kind = NotificationEvent.BORROWED
+    return [member_message(kind, member, titles)] + staff_messages(kind, member, titles)
+
+
+def returned_messages(member, titles):
+    """
+    Build every email to send after a member returned one or more books.
+    """
+    kind = NotificationEvent.RETURNED
+    return [member_message(kind, member, titles)] + staff_messages(kind, member, titles)
+
+
+def hold_messages(member, titles):
+    """
+    Build every email to send after returned copies were lent to a member from their holds.
+
+    Only the member at the head of the queue is told; staff are notified as for any other loan.
+    """
+    if len(titles) == 1:
+        subject = 'Hold Ready'
+        message = f'A copy of the book you were waiting for has been borrowed for you: {titles[0]}.'
+    else:
+        subject = 'Holds Ready'
+        message = f'Copies of the books you were waiting for have been borrowed for you: {_join_titles(titles)}.'
+    member_notice = (subject, message, settings.EMAIL_HOST_USER, [member.email])
+    return [member_notice] + staff_messages(NotificationEvent.BORROWED, member, titles)
+
+
+def digest_message(events):
+    """
+    Build one staff summary email for a batch of stored borrow and return events.
+    """
+    borrowed = sum(1 for event in events if event.kind == NotificationEvent.BORROWED)
+    lines = [
+        f'Library activity from {events[0].created_at:%Y-%m-%d %H:%M} to {events[-1].created_at:%Y-%m-%d %H:%M} UTC: '
+        f'{borrowed} borrowed, {len(events) - borrowed} returned.',
+        '',
+    ]
+    lines.extend(
+        f"{event.created_at:%H:%M} '{event.book_title}' {event.get_kind_display().lower()} by {event.member_name} "
+        f'(Email: {event.member_email})'
+        for event in events
+    )
+    return 'Library Activity Digest', '\n'.join(lines), settings.EMAIL_HOST_USER, get_staff_emails()
@@ -0,0 +1,10 @@
+from core.pagination import KeysetPagination
+
+
+class BorrowHistoryPagination(KeysetPagination):
+    """
+    Keyset pagination for borrow history, most recent loan first with ``id`` as the tie-breaker.
+    """
+    ordering = ('-borrowed_at', '-id')
+    page_size = 50
+    max_page_size = 200
@@ -1,6 +1,9 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
 
-from core.models import BorrowRecord
+from core.models import Book, BookHold, BorrowRecord
 
 
 class BorrowRecordSerializer(serializers.ModelSerializer):
@@ -10,3 +13,102 @@ class BorrowRecordSerializer(serializers.ModelSerializer):
     class Meta:
         model = BorrowRecord
         fields = ['id', 'book', 'member', 'borrowed_at', 'due_date', 'returned_at']
+
+
+class BookHoldSerializer(serializers.ModelSerializer):
+    """
+    Serializer for BookHold model; ``position`` is the hold's place in the book's queue, set by the view.
+    """
+    position = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = BookHold
+        fields = ['id', 'book', 'member', 'created_at', 'position']
+
+
+class BookSummarySerializer(serializers.ModelSerializer):
+    """
+    Serializer for the book fields shown alongside a borrow record.
+    """
+    class Meta:
+        model = Book
+        fields = ['id', 'title', 'author']
+
+
+class ExpandedBorrowRecordSerializer(serializers.ModelSerializer):
+    """
+    Serializer for BorrowRecord with its book nested; the queryset should ``select_related('book')``.
+    """
+    book = BookSummarySerializer(read_only=True)
+
+    class Meta:
+        model = BorrowRecord
+        fields = ['id', 'book', 'member', 'borrowed_at', 'due_date', 'returned_at']
+
+
+class BorrowHistoryFilterSerializer(serializers.Serializer):
+    """
+    Validates the query parameters of the borrow history endpoint.
+    """
+    OPEN = 'open'
+    RETURNED = 'returned'
+
+    borrowed_after = serializers.DateTimeField(required=False)
+    borrowed_before = serializers.DateTimeField(required=False)
+    state = serializers.ChoiceField(choices=[OPEN, RETURNED], required=False)
+    book = serializers.IntegerField(min_value=1, required=False)
+    member = serializers.IntegerField(min_value=1, required=False)
+
+    def filter_queryset(self, queryset):
+        """
+        Apply the validated filters to a BorrowRecord queryset.
+        """
+        data = self.validated_data
+        if 'borrowed_after' in data:
+            queryset = queryset.filter(borrowed_at__gte=data['borrowed_after'])
+        if 'borrowed_before' in data:
+            queryset = queryset.filter(borrowed_at__lt=data['borrowed_before'])
+        if 'state' in data:
+            queryset = queryset.filter(returned_at__isnull=data['state'] == self.OPEN)
+        if 'book' in data:
+            queryset = queryset.filter(book_id=data['book'])
+        if 'member' in data:
+            queryset = queryset.filter(member_id=data['member'])
+        return queryset
+
+
+class CirculationReportFilterSerializer(serializers.Serializer):
+    """
+    Validates the query parameters of the circulation analytics endpoint; the default range is the last 30 full days.
+    """
+    DEFAULT_DAYS = 30
+    MAX_DAYS = 366
+
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, required=False)
+
+    def validate(self, attrs):
+        end = attrs.get('end') or timezone.localdate() - timedelta(days=1)
+        start = attrs.get('start') or end - timedelta(days=self.DEFAULT_DAYS - 1)
+        if start > end:
+            raise serializers.ValidationError({'start': 'Must not be after end.'})
+        if (end - start).days >= self.MAX_DAYS:
+            raise serializers.ValidationError({'start': f'The range cannot exceed {self.MAX_DAYS} days.'})
+        return {**attrs, 'start': start, 'end': end}
+
+
+class BookBatchSerializer(serializers.Serializer):
+    """
+    Validates the list of book IDs for a multi-book checkout or return.
+    """
+    MAX_BOOKS = 20
+
+    book_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False,
+                                     max_length=MAX_BOOKS)
+
+    def validate_book_ids(self, value):
+        """
+        Drop repeated IDs, keeping the order in which the books were given.
+        """
+        return list(dict.fromkeys(value))
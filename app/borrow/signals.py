@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import User
+
+from .notifications import invalidate_staff_emails
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def refresh_staff_emails(sender, **kwargs):
+    """
+    Any user change may add, remove or rename a staff recipient, so the cached list is dropped.
+    """
+    invalidate_staff_emails()
@@ -1,9 +1,26 @@
-from celery import shared_task
+import logging
+from datetime import timedelta
+
+from celery import group, shared_task
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import (EmailMessage, get_connection, send_mail,
+                              send_mass_mail)
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from core.models import BorrowRecord, NotificationEvent, OutboxMessage
+
+from .analytics import rollup_day
+from .archive import archive_cutoff, archive_returned_records
+from .notifications import digest_message
+
+DIGEST_BATCH_SIZE = 5000
+OUTBOX_BATCH_SIZE = 500
+OUTBOX_MAX_ATTEMPTS = 5
 
-from core.models import BorrowRecord
+logger = logging.getLogger(__name__)
 
 
 @shared_task
@@ -19,19 +36,212 @@ def send_notification_email(subject, message, recipient_list):
     )
 
 
+@shared_task
+def send_notification_emails(messages):
+    """
+    Send several notification emails over a single SMTP connection.
+
+    Each message is a ``(subject, message, from_email, recipient_list)`` tuple; messages without recipients are skipped.
+    """
+    send_mass_mail([message for message in messages if message[3]])
+
+
+@shared_task
+def dispatch_outbox():
+    """
+    Send the emails queued in the outbox, ``OUTBOX_BATCH_SIZE`` at a time over a single SMTP connection.
+
+    A batch is claimed with ``SKIP LOCKED`` and its sent messages are deleted in the transaction that sends them, so
+    overlapping runs never send a message twice. Messages are sent one at a time: one that fails has its attempts
+    counted and is retried by the next run, up to ``OUTBOX_MAX_ATTEMPTS`` times, without holding back or resending
+    the others; messages that keep failing stay in the table for inspection.
+    Returns the number of messages sent.
+    """
+    sent = 0
+    failed_ids = []
+    while True:
+        with transaction.atomic():
+            # Messages that failed in this run are left to the next one.
+            batch = list(OutboxMessage.objects.select_for_update(skip_locked=True)
+                         .filter(attempts__lt=OUTBOX_MAX_ATTEMPTS).exclude(id__in=failed_ids)
+                         .order_by('id')[:OUTBOX_BATCH_SIZE])
+            if not batch:
+                return sent
+
+            sent_ids, batch_failed_ids = [], []
+            with get_connection() as connection:
+                for outbox_message in batch:
+                    message = EmailMessage(subject=outbox_message.subject, body=outbox_message.message,
+                                           from_email=outbox_message.from_email, to=outbox_message.recipient_list,
+                                           connection=connection)
+                    try:
+                        message.send()
+                    except Exception:
+                        logger.exception('Sending outbox message %d failed.', outbox_message.id)
+                        batch_failed_ids.append(outbox_message.id)
+                    else:
+                        sent_ids.append(outbox_message.id)
+
+            OutboxMessage.objects.filter(id__in=sent_ids).delete()
+            OutboxMessage.objects.filter(id__in=batch_failed_ids).update(attempts=F('attempts') + 1)
+            sent += len(sent_ids)
+            failed_ids.extend(batch_failed_ids)
+
+
+def overdue_records(now):
+    """
+    Return the open loans whose next overdue reminder is due under ``OVERDUE_REMINDER_SCHEDULE_DAYS``.
+
+    A loan whose ``overdue_notice_count`` is ``n`` gets the next reminder once it is ``schedule[n]`` days past its
+    due date, and none after the schedule is exhausted. The leading ``due_date`` bound lets PostgreSQL range-scan
+    the partial ``borrow_open_due_date_idx`` index instead of every open loan.
+    """
+    schedule = sorted(settings.OVERDUE_REMINDER_SCHEDULE_DAYS)
+    if not schedule:
+        return BorrowRecord.objects.none()
+
+    next_reminder_due = Q()
+    for notice_count, days in enumerate(schedule):
+        next_reminder_due |= Q(overdue_notice_count=notice_count, due_date__lte=now - timedelta(days=days))
+    return BorrowRecord.objects.filter(next_reminder_due, due_date__lte=now - timedelta(days=schedule[0]),
+                                       returned_at__isnull=True)
+
+
+def reminded_notice_count(now):
+    """
+    Return the ``overdue_notice_count`` of a loan reminded at ``now``: the number of schedule steps it has passed.
+
+    A loan that is already several steps overdue, e.g. when the schedule is introduced or changed, gets one reminder
+    for all of them instead of one per night.
+    """
+    schedule = sorted(settings.OVERDUE_REMINDER_SCHEDULE_DAYS)
+    steps = [When(due_date__lte=now - timedelta(days=days), then=Value(step))
+             for step, days in reversed(list(enumerate(schedule, 1)))]
+    return Case(*steps, default=F('overdue_notice_count') + 1)
+
+
+def overdue_id_ranges(now, chunk_size):
+    """
+    Split the loans with a reminder due into consecutive ``(first_id, last_id)`` ranges of at most ``chunk_size``
+    records.
+
+    Only ids are read, through a server-side cursor, so planning stays cheap however many loans are overdue.
+    """
+    ranges = []
+    ids = overdue_records(now).order_by('id').values_list('id', flat=True).iterator(chunk_size=chunk_size)
+    for index, record_id in enumerate(ids):
+        if index % chunk_size == 0:
+            ranges.append([record_id, record_id])
+        else:
+            ranges[-1][1] = record_id
+    return ranges
+
+
 @shared_task
 def send_overdue_notifications():
     """
-    Send overdue notifications for books that are past their due date.
+    Send the overdue reminders that are due for books past their due date.
+
+    The overdue loans are split into id ranges that are sent in parallel by ``send_overdue_notifications_chunk``
+    tasks. Returns the number of chunks dispatched.
     """
-    overdue_records = BorrowRecord.objects.filter(due_date__lt=timezone.now(), returned_at__isnull=True)
+    now = timezone.now()
+    ranges = overdue_id_ranges(now, settings.OVERDUE_NOTIFICATION_CHUNK_SIZE)
+    if ranges:
+        group(send_overdue_notifications_chunk.s(first_id, last_id, now.isoformat())
+              for first_id, last_id in ranges).apply_async()
+    return len(ranges)
+
 
-    for record in overdue_records:
-        send_mail(
-            subject="Overdue Book Notification",
-            message=f"Dear {record.member.email},\n\nThe book '{record.book.title}' you borrowed is overdue. "
-                    f"Please return it as soon as possible.",
-            from_email=settings.EMAIL_HOST_USER,
-            recipient_list=[record.member.email],
+@shared_task
+def send_overdue_notifications_chunk(first_id, last_id, now):
+    """
+    Send the due overdue reminders for one id range of loans over a single SMTP connection.
+
+    The loans are claimed in a short transaction: locked with ``SKIP LOCKED`` and marked as reminded straight away,
+    so a retried or overlapping chunk finds nothing left to send and returns are not kept waiting on SMTP.
+    Reminders are then sent one at a time; a loan whose reminder fails is logged and given back its previous
+    reminder state, to be sent by the next run, without resending the others. Members and books are loaded in the
+    same query as the loans.
+    """
+    now = parse_datetime(now)
+    with transaction.atomic():
+        records = list(overdue_records(now)
+                       .filter(id__range=(first_id, last_id))
+                       .select_related('member', 'book')
+                       .only('id', 'overdue_notice_count', 'last_overdue_notified_at', 'member__email',
+                             'book__title')
+                       .select_for_update(skip_locked=True, of=('self',)))
+        if not records:
+            return 0
+        BorrowRecord.objects.filter(id__in=[record.id for record in records]).update(
+            overdue_notice_count=reminded_notice_count(now),
+            last_overdue_notified_at=now,
         )
-        print(f"Book {record.book.title} is overdue for {record.member.email}")
+
+    sent = 0
+    with get_connection() as connection:
+        for record in records:
+            message = EmailMessage(
+                subject="Overdue Book Notification",
+                body=f"Dear {record.member.email},\n\nThe book '{record.book.title}' you borrowed is overdue. "
+                     f"Please return it as soon as possible.",
+                from_email=settings.EMAIL_HOST_USER,
+                to=[record.member.email],
+                connection=connection,
+            )
+            try:
+                message.send()
+            except Exception:
+                logger.exception('Sending the overdue reminder of borrow record %d failed.', record.id)
+                BorrowRecord.objects.filter(id=record.id, last_overdue_notified_at=now).update(
+                    overdue_notice_count=record.overdue_notice_count,
+                    last_overdue_notified_at=record.last_overdue_notified_at,
+                )
+            else:
+                sent += 1
+    return sent
+
+
+@shared_task
+def send_staff_digest():
+    """
+    Send the borrow and return events stored in digest mode to library staff as summary emails.
+
+    Events are claimed with ``SKIP LOCKED`` and deleted in the same transaction that sends their email, so a failed
+    send leaves them for the next run and overlapping runs never report an event twice.
+    """
+    sent = 0
+    while True:
+        with transaction.atomic():
+            events = list(NotificationEvent.objects.select_for_update(skip_locked=True)
+                          .order_by('id')[:DIGEST_BATCH_SIZE])
+            if not events:
+                return sent
+
+            subject, message, from_email, recipient_list = digest_message(events)
+            if recipient_list:
+                send_mail(subject, message, from_email, recipient_list)
+            NotificationEvent.objects.filter(id__in=[event.id for event in events]).delete()
+            sent += len(events)
+
+
+@shared_task
+def archive_borrow_records():
+    """
+    Move loans returned more than ``BORROW_ARCHIVE_AFTER_DAYS`` ago to the archive table.
+
+    Returns the number of records moved.
+    """
+    return archive_returned_records(archive_cutoff())
+
+
+@shared_task
+def rollup_daily_circulation(day=None):
+    """
+    Roll up one day of loans into DailyCirculation, yesterday by default (``day`` is an ISO date string).
+
+    Rerunning a day replaces its rollup, so a failed or repeated night is safe. Returns the number of book rows written.
+    """
+    day = parse_date(day) if day else timezone.localdate() - timedelta(days=1)
+    return rollup_day(day)
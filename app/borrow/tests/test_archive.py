@@ -0,0 +1,67 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from borrow.archive import archive_returned_records
+from borrow.tasks import archive_borrow_records
+from core.models import ArchivedBorrowRecord, Book, BorrowRecord, User
+
+
+class BorrowArchiveTests(TestCase):
+    """Tests for moving old returned loans to the archive table."""
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.book = Book.objects.create(title='Test Book', author='Test Author', total_copies=20, available_copies=19)
+        self.member = User.objects.create(name='visitor', email='visitor@test.com', user_type=User.VISITOR_USER)
+        self.old = [self.create_record(days_ago=400 + i) for i in range(5)]
+        self.recent = self.create_record(days_ago=30)
+        self.open = BorrowRecord.objects.create(book=self.book, member=self.member)
+
+    def create_record(self, days_ago):
+        returned_at = self.now - timedelta(days=days_ago)
+        return BorrowRecord.objects.create(book=self.book, member=self.member, due_date=returned_at,
+                                           returned_at=returned_at)
+
+    def test_archive_moves_old_returned_records(self):
+        """Ensure only loans returned before the cutoff are moved, in batches, keeping their ids and dates."""
+        moved = archive_returned_records(self.now - timedelta(days=365), batch_size=2)
+
+        self.assertEqual(moved, 5)
+        self.assertEqual(set(BorrowRecord.objects.values_list('id', flat=True)), {self.recent.id, self.open.id})
+        archived = ArchivedBorrowRecord.objects.get(id=self.old[0].id)
+        self.assertEqual((archived.book_id, archived.member_id, archived.borrowed_at, archived.returned_at),
+                         (self.book.id, self.member.id, self.old[0].borrowed_at, self.old[0].returned_at))
+        self.assertEqual(ArchivedBorrowRecord.objects.count(), 5)
+
+    def test_archive_is_repeatable(self):
+        """Ensure a second run finds nothing left to move."""
+        archive_returned_records(self.now - timedelta(days=365))
+        self.assertEqual(archive_returned_records(self.now - timedelta(days=365)), 0)
+
+    def test_archive_conflict_keeps_batch(self):
+        """Ensure a record whose id is already archived rolls its batch back instead of being deleted."""
+        ArchivedBorrowRecord.objects.create(id=self.old[1].id, book=self.book, member=self.member,
+                                            borrowed_at=self.now, due_date=self.now, returned_at=self.now)
+
+        with self.assertRaises(IntegrityError):
+            archive_returned_records(self.now - timedelta(days=365), batch_size=2)
+
+        self.assertEqual(BorrowRecord.objects.filter(id__in=[record.id for record in self.old]).count(), 5)
+        self.assertEqual(ArchivedBorrowRecord.objects.count(), 1)
+
+    @override_settings(BORROW_ARCHIVE_AFTER_DAYS=365)
+    def test_archive_task(self):
+        """Ensure the beat task archives loans returned more than BORROW_ARCHIVE_AFTER_DAYS ago."""
+        self.assertEqual(archive_borrow_records(), 5)
+
+    def test_archive_command(self):
+        """Ensure the management command honours --days."""
+        out = StringIO()
+        call_command('archive_borrow_records', days=10, stdout=out)
+        self.assertIn('Archived 6 borrow records.', out.getvalue())
+        self.assertEqual(list(BorrowRecord.objects.values_list('id', flat=True)), [self.open.id])
@@ -0,0 +1,153 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from books.importer import import_books
+from core.models import Book, BookHold, BorrowRecord, OutboxMessage, User
+
+HOLD_READY_MESSAGE = 'A copy of the book you were waiting for has been borrowed for you: Test Book.'
+
+
+class BookHoldApiTests(TestCase):
+    """Tests for the hold queue of books without available copies."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.book = Book.objects.create(title='Test Book', author='Test Author', total_copies=1, available_copies=0)
+        self.hold_url = reverse('borrow:hold-book', kwargs={'pk': self.book.id})
+        self.return_url = reverse('borrow:return-book', kwargs={'pk': self.book.id})
+        self.borrower, self.first, self.second = [
+            User.objects.create(name=f'visitor{i}', email=f'visitor{i}@test.com', user_type=User.VISITOR_USER,
+                                is_active=True)
+            for i in range(3)
+        ]
+        BorrowRecord.objects.create(book=self.book, member=self.borrower)
+
+    def hold(self, member):
+        self.client.force_authenticate(member)
+        return self.client.post(self.hold_url, format='json')
+
+    def queued(self, email):
+        return list(OutboxMessage.objects.filter(recipient_list=[email]).values_list('subject', 'message'))
+
+    def test_hold_queue_positions(self):
+        """Ensure members join the queue in order."""
+        first = self.hold(self.first)
+        second = self.hold(self.second)
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(first.data['position'], 1)
+        self.assertEqual(second.data['position'], 2)
+        self.assertEqual(second.data['member'], self.second.id)
+
+    def test_hold_rejected(self):
+        """Ensure a hold is refused when a copy is available, for the current borrower and when repeated."""
+        self.assertEqual(self.hold(self.borrower).data['detail'], 'You have already borrowed this book.')
+
+        self.hold(self.first)
+        response = self.hold(self.first)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['detail'], 'You are already waiting for this book.')
+
+        Book.objects.filter(id=self.book.id).update(available_copies=1)
+        response = self.hold(self.second)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['detail'], 'Copies of this book are available; borrow it instead.')
+
+    def test_hold_forbidden_for_staff(self):
+        """Ensure library staff cannot hold books."""
+        staff = User.objects.create(name='staff', email='staff@test.com', user_type=User.LIBRARY_USER)
+        self.assertEqual(self.hold(staff).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_cancel_hold(self):
+        """Ensure a member can leave the queue."""
+        self.hold(self.first)
+
+        response = self.client.delete(self.hold_url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(BookHold.objects.exists())
+        self.assertEqual(self.client.delete(self.hold_url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_return_serves_head_of_queue(self):
+        """Ensure a returned copy is lent to the longest-waiting member, who alone is notified."""
+        self.hold(self.first)
+        self.hold(self.second)
+
+        self.client.force_authenticate(self.borrower)
+        response = self.client.post(self.return_url, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 0)
+        self.assertTrue(BorrowRecord.objects.filter(book=self.book, member=self.first, returned_at__isnull=True)
+                        .exists())
+        self.assertEqual(list(BookHold.objects.values_list('member_id', flat=True)), [self.second.id])
+
+        self.assertEqual(self.queued(self.first.email),
+                         [('Hold Ready', HOLD_READY_MESSAGE)])
+        self.assertEqual(self.queued(self.second.email), [])
+
+    def test_return_skips_inactive_holders(self):
+        """Ensure holds of members who can no longer borrow are dropped and the next member is served."""
+        self.hold(self.first)
+        self.hold(self.second)
+        User.objects.filter(id=self.first.id).update(is_active=False)
+
+        self.client.force_authenticate(self.borrower)
+        self.client.post(self.return_url, format='json')
+
+        self.assertTrue(BorrowRecord.objects.filter(member=self.second, returned_at__isnull=True).exists())
+        self.assertFalse(BookHold.objects.exists())
+
+    def test_return_without_holds(self):
+        """Ensure a copy nobody is waiting for goes back on the shelf."""
+        self.client.force_authenticate(self.borrower)
+        self.client.post(self.return_url, format='json')
+
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 1)
+
+    def test_batch_return_serves_holds(self):
+        """Ensure a batch return serves the queue of every held book and notifies the holders."""
+        other_book = Book.objects.create(title='Other Book', author='Other Author', total_copies=1, available_copies=0)
+        BorrowRecord.objects.create(book=other_book, member=self.borrower)
+        self.hold(self.first)
+
+        self.client.force_authenticate(self.borrower)
+        response = self.client.post(reverse('borrow:return-batch'), {'book_ids': [self.book.id, other_book.id]},
+                                    format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Book.objects.get(id=self.book.id).available_copies, 0)
+        self.assertEqual(Book.objects.get(id=other_book.id).available_copies, 1)
+        self.assertTrue(BorrowRecord.objects.filter(book=self.book, member=self.first, returned_at__isnull=True)
+                        .exists())
+        self.assertEqual(self.queued(self.first.email),
+                         [('Hold Ready', HOLD_READY_MESSAGE)])
+
+    def test_added_copies_serve_holds(self):
+        """Ensure copies added by staff go to the waiting members before anyone else can borrow them."""
+        self.hold(self.first)
+        self.hold(self.second)
+        staff = User.objects.create(name='staff', email='staff@test.com', user_type=User.LIBRARY_USER)
+
+        self.client.force_authenticate(staff)
+        response = self.client.patch(reverse('books:book-detail', args=[self.book.id]), {'total_copies': 4},
+                                     format='json')
+
+        self.assertEqual(response.data['available_copies'], 1)
+        self.assertEqual(BorrowRecord.objects.filter(book=self.book, returned_at__isnull=True).count(), 3)
+        self.assertFalse(BookHold.objects.exists())
+        self.assertEqual(self.queued(self.second.email), [('Hold Ready', HOLD_READY_MESSAGE)])
+
+    def test_imported_copies_serve_holds(self):
+        """Ensure copies added by a catalog import serve the hold queue."""
+        self.hold(self.first)
+        import_books([{'title': 'Test Book', 'author': 'Test Author', 'total_copies': 2}])
+
+        self.assertEqual(Book.objects.get(id=self.book.id).available_copies, 0)
+        self.assertTrue(BorrowRecord.objects.filter(book=self.book, member=self.first).exists())
+        self.assertEqual(self.queued(self.first.email), [('Hold Ready', HOLD_READY_MESSAGE)])
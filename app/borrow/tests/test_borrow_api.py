@@ -1,6 +1,8 @@
 from unittest.mock import patch
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 
@@ -119,3 +121,71 @@ class BorrowBookApiTests(BorrowBookApiTestsBase):
         response = self.return_book()
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
         self.assertEqual(response.data['detail'], 'No record found for this book or you have already returned it.')
+
+    def test_return_locks_book_before_loan(self):
+        """Ensure a single return locks the book row before the loan, in the order the batch views use."""
+        visitor = User.objects.create(name='visitor', email='visitor@test.com', user_type=User.VISITOR_USER,
+                                      is_active=True)
+        BorrowRecord.objects.create(book=self.book, member=visitor)
+        self.client.force_authenticate(visitor)
+
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(self.return_book().status_code, status.HTTP_200_OK)
+
+        locks = [query['sql'] for query in captured if 'FOR UPDATE' in query['sql']]
+        self.assertIn('FROM "core_book"', locks[0])
+        self.assertIn('FROM "core_borrowrecord"', locks[1])
+
+
+class BorrowedBooksApiTests(BorrowBookApiTestsBase):
+    """Tests for listing a member's open loans."""
+
+    def create_loans(self, member, count):
+        books = Book.objects.bulk_create(
+            Book(title=f'Loaned Book {i}', author='Loaned Author', total_copies=1, available_copies=0)
+            for i in range(count)
+        )
+        for book in books:
+            BorrowRecord.objects.create(book=book, member=member)
+        return books
+
+    def test_my_borrowed_books_expanded(self):
+        """Ensure ten loans with their books are served by one query besides authentication."""
+        user = self.authenticate(User.VISITOR_USER)
+        books = self.create_loans(user, 10)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('borrow:my-borrowed-books'), {'expand': 'book'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([record['book'] for record in response.data],
+                         [{'id': book.id, 'title': book.title, 'author': book.author} for book in books])
+
+    def test_my_borrowed_books_ids(self):
+        """Ensure the default response keeps returning book ids."""
+        user = self.authenticate(User.VISITOR_USER)
+        books = self.create_loans(user, 2)
+
+        response = self.client.get(reverse('borrow:my-borrowed-books'))
+        self.assertEqual([record['book'] for record in response.data], [book.id for book in books])
+
+    def test_my_borrowed_books_empty(self):
+        """Ensure the empty case is answered from the list query alone."""
+        self.authenticate(User.VISITOR_USER)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('borrow:my-borrowed-books'), {'expand': 'book'})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data['detail'], 'No borrowed books found for you.')
+
+    def test_user_borrowed_books_expanded(self):
+        """Ensure library staff get a visitor's loans with the books nested."""
+        self.authenticate(User.LIBRARY_USER)
+        visitor = User.objects.create(name='visitor', email='visitor@test.com', user_type=User.VISITOR_USER)
+        books = self.create_loans(visitor, 3)
+        url = reverse('borrow:user-borrowed-books', kwargs={'user_id': visitor.id})
+
+        response = self.client.get(url, {'expand': 'book'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([record['book']['title'] for record in response.data], [book.title for book in books])
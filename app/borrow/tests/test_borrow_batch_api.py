@@ -0,0 +1,86 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+
+from core.models import Book, BorrowRecord, OutboxMessage, User
+from user.tests.test_user_api import UserApiTestsBase
+
+
+class BatchBorrowApiTests(UserApiTestsBase, TestCase):
+    """Tests for multi-book checkout and return."""
+
+    def setUp(self):
+        super().setUp()
+        self.batch_borrow_url = reverse('borrow:borrow-batch')
+        self.batch_return_url = reverse('borrow:return-batch')
+        self.books = [
+            Book.objects.create(title=f'Book {i}', author='Author', total_copies=2, available_copies=2)
+            for i in range(3)
+        ]
+
+    def test_batch_borrow(self):
+        """Ensure every available book is borrowed and failures are reported per book."""
+        user = self.authenticate(User.VISITOR_USER)
+        empty = Book.objects.create(title='Empty', author='Author', total_copies=1, available_copies=0)
+        BorrowRecord.objects.create(book=self.books[1], member=user)
+        book_ids = [self.books[0].id, self.books[1].id, empty.id, 999999, self.books[2].id, self.books[0].id]
+
+        response = self.client.post(self.batch_borrow_url, {'book_ids': book_ids}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([result['book'] for result in results], book_ids[:5])
+        self.assertEqual([result['success'] for result in results], [True, False, False, False, True])
+        self.assertEqual(results[1]['detail'], 'You have already borrowed this book.')
+        self.assertEqual(results[2]['detail'], 'No copies of this book are available.')
+        self.assertEqual(results[3]['detail'], 'Book not found.')
+        self.assertEqual(results[0]['record']['member'], user.id)
+
+        self.books[0].refresh_from_db()
+        self.books[1].refresh_from_db()
+        self.assertEqual(self.books[0].available_copies, 1)
+        self.assertEqual(self.books[1].available_copies, 2)
+        self.assertTrue(BorrowRecord.objects.get(book=self.books[2], member=user).due_date)
+        outbox = OutboxMessage.objects.get()
+        self.assertEqual((outbox.subject, outbox.recipient_list), ('Books Borrowed', [user.email]))
+
+    def test_batch_return(self):
+        """Ensure open loans are returned and books that were not borrowed are reported."""
+        user = self.authenticate(User.VISITOR_USER)
+        self.client.post(self.batch_borrow_url, {'book_ids': [self.books[0].id, self.books[1].id]}, format='json')
+        OutboxMessage.objects.all().delete()
+
+        response = self.client.post(self.batch_return_url,
+                                    {'book_ids': [self.books[0].id, self.books[2].id]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['success'] for result in response.data['results']], [True, False])
+        self.assertIsNotNone(response.data['results'][0]['record']['returned_at'])
+        self.books[0].refresh_from_db()
+        self.assertEqual(self.books[0].available_copies, 2)
+        self.assertEqual(BorrowRecord.objects.filter(member=user, returned_at__isnull=True).count(), 1)
+        self.assertEqual(list(OutboxMessage.objects.values_list('subject', flat=True)), ['Book Returned'])
+
+    def test_batch_without_success_sends_nothing(self):
+        """Ensure no notification is queued when nothing was borrowed."""
+        self.authenticate(User.VISITOR_USER)
+        response = self.client.post(self.batch_borrow_url, {'book_ids': [999999]}, format='json')
+        self.assertFalse(response.data['results'][0]['success'])
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_batch_validation(self):
+        """Ensure empty and oversized batches are rejected."""
+        self.authenticate(User.VISITOR_USER)
+        self.assertEqual(self.client.post(self.batch_borrow_url, {'book_ids': []}, format='json').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        too_many = list(range(1, 30))
+        self.assertEqual(self.client.post(self.batch_borrow_url, {'book_ids': too_many}, format='json').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_forbidden_for_staff(self):
+        """Ensure library staff cannot borrow books."""
+        self.authenticate(user_type=User.LIBRARY_USER)
+        response = self.client.post(self.batch_borrow_url, {'book_ids': [self.books[0].id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
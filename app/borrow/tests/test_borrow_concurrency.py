@@ -0,0 +1,88 @@
+import threading
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Book, BorrowRecord, User
+
+
+class BorrowConcurrencyTests(TransactionTestCase):
+    """Stress tests firing concurrent borrow and return requests at a single book."""
+
+    threads = 16
+
+    def setUp(self):
+        self.book = Book.objects.create(title='Test Book', author='Test Author', total_copies=5, available_copies=5)
+        self.borrow_url = reverse('borrow:borrow-book', kwargs={'pk': self.book.id})
+        self.return_url = reverse('borrow:return-book', kwargs={'pk': self.book.id})
+        patcher = patch('borrow.tasks.send_notification_email.delay')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_visitor(self, index):
+        return User.objects.create(name=f'visitor{index}', email=f'visitor{index}@test.com',
+                                   user_type=User.VISITOR_USER, is_active=True)
+
+    def run_concurrently(self, users, url):
+        """Fire one request per user at the same moment and collect the status codes."""
+        barrier = threading.Barrier(len(users))
+        codes = []
+        lock = threading.Lock()
+
+        def worker(user):
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                barrier.wait()
+                response = client.post(url, format='json')
+                with lock:
+                    codes.append(response.status_code)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(user,)) for user in users]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return codes
+
+    def test_concurrent_borrows_never_oversell(self):
+        """Ensure many visitors racing for five copies get exactly five loans."""
+        users = [self.create_visitor(index) for index in range(self.threads)]
+
+        codes = self.run_concurrently(users, self.borrow_url)
+
+        self.assertEqual(codes.count(status.HTTP_201_CREATED), 5)
+        self.assertEqual(codes.count(status.HTTP_400_BAD_REQUEST), self.threads - 5)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 0)
+        self.assertEqual(BorrowRecord.objects.filter(book=self.book, returned_at__isnull=True).count(), 5)
+
+    def test_concurrent_duplicate_borrows(self):
+        """Ensure one visitor sending the same borrow many times at once gets a single loan."""
+        user = self.create_visitor(0)
+
+        codes = self.run_concurrently([user] * self.threads, self.borrow_url)
+
+        self.assertEqual(codes.count(status.HTTP_201_CREATED), 1)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 4)
+        self.assertEqual(BorrowRecord.objects.filter(book=self.book, member=user).count(), 1)
+
+    def test_concurrent_returns_are_counted_once(self):
+        """Ensure returning the same loan many times at once only frees one copy."""
+        user = self.create_visitor(0)
+        BorrowRecord.objects.create(book=self.book, member=user)
+        Book.objects.filter(pk=self.book.pk).update(available_copies=4)
+
+        codes = self.run_concurrently([user] * self.threads, self.return_url)
+
+        self.assertEqual(codes.count(status.HTTP_200_OK), 1)
+        self.assertEqual(codes.count(status.HTTP_404_NOT_FOUND), self.threads - 1)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 5)
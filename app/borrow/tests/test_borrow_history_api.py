@@ -0,0 +1,138 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from borrow.archive import archive_returned_records
+from core.models import ArchivedBorrowRecord, Book, BorrowRecord, User
+from user.tests.test_user_api import UserApiTestsBase
+
+
+class BorrowHistoryApiTests(UserApiTestsBase, TestCase):
+    """Tests for the paginated borrow history endpoint."""
+
+    def setUp(self):
+        super().setUp()
+        self.history_url = reverse('borrow:borrow-history')
+        self.now = timezone.now()
+        self.books = [
+            Book.objects.create(title=f'Book {i}', author=f'Author {i}', total_copies=2, available_copies=2)
+            for i in range(3)
+        ]
+        self.other = User.objects.create(name='other', email='other@test.com', user_type=User.VISITOR_USER)
+
+    def create_record(self, member, book, days_ago, returned=True):
+        borrowed_at = self.now - timedelta(days=days_ago)
+        record = BorrowRecord.objects.create(book=book, member=member, due_date=borrowed_at + BorrowRecord.LOAN_PERIOD,
+                                             returned_at=borrowed_at + timedelta(days=1) if returned else None)
+        # borrowed_at is auto_now_add, so backdate it with an update.
+        BorrowRecord.objects.filter(id=record.id).update(borrowed_at=borrowed_at)
+        return record
+
+    def create_history(self, member):
+        """Create five loans borrowed 1, 2, 3, 4 and 5 days ago; the most recent one is still open."""
+        return [
+            self.create_record(member, self.books[days_ago % 3], days_ago, returned=days_ago > 1)
+            for days_ago in range(1, 6)
+        ]
+
+    def get_ids(self, response):
+        return [record['id'] for record in response.data['results']]
+
+    def test_visitor_history_is_paginated(self):
+        """Ensure a visitor pages through their own loans, most recent first, with books nested."""
+        user = self.authenticate(User.VISITOR_USER)
+        records = self.create_history(user)
+        self.create_history(self.other)
+
+        first = self.client.get(self.history_url, {'page_size': 3})
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_ids(first), [record.id for record in records[:3]])
+        self.assertEqual(first.data['results'][0]['book'],
+                         {'id': self.books[1].id, 'title': 'Book 1', 'author': 'Author 1'})
+        self.assertIsNone(first.data['results'][0]['returned_at'])
+
+        second = self.client.get(first.data['next'])
+        self.assertEqual(self.get_ids(second), [record.id for record in records[3:]])
+        self.assertIsNone(second.data['next'])
+
+    def test_history_filters(self):
+        """Ensure the date range, state and book filters narrow the history."""
+        user = self.authenticate(User.VISITOR_USER)
+        records = self.create_history(user)
+
+        response = self.client.get(self.history_url, {
+            'borrowed_after': (self.now - timedelta(days=4, hours=12)).isoformat(),
+            'borrowed_before': (self.now - timedelta(days=1, hours=12)).isoformat(),
+        })
+        self.assertEqual(self.get_ids(response), [record.id for record in records[1:4]])
+
+        response = self.client.get(self.history_url, {'state': 'open'})
+        self.assertEqual(self.get_ids(response), [records[0].id])
+
+        response = self.client.get(self.history_url, {'state': 'returned', 'book': self.books[1].id})
+        self.assertEqual(self.get_ids(response), [records[3].id])
+
+    def test_history_query_count(self):
+        """Ensure a page of history costs one query per table, however many records it holds."""
+        user = self.authenticate(User.VISITOR_USER)
+        self.create_history(user)
+        self.client.get(self.history_url)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(self.history_url)
+        self.assertEqual(len(response.data['results']), 5)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.history_url, {'state': 'open'})
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_history_includes_archived_records(self):
+        """Ensure archived loans are merged into the history pages in order."""
+        user = self.authenticate(User.VISITOR_USER)
+        records = self.create_history(user)
+        archive_returned_records(self.now - timedelta(days=1, hours=12))
+        self.assertEqual(ArchivedBorrowRecord.objects.count(), 3)
+
+        first = self.client.get(self.history_url, {'page_size': 2})
+        second = self.client.get(first.data['next'])
+        third = self.client.get(second.data['next'])
+
+        self.assertEqual(self.get_ids(first) + self.get_ids(second) + self.get_ids(third),
+                         [record.id for record in records])
+        self.assertEqual(third.data['results'][0]['book']['title'], 'Book 2')
+        self.assertIsNone(third.data['next'])
+
+        response = self.client.get(self.history_url, {'state': 'returned', 'book': self.books[1].id})
+        self.assertEqual(self.get_ids(response), [records[3].id])
+
+    def test_invalid_filters(self):
+        """Ensure malformed filters are rejected."""
+        self.authenticate(User.VISITOR_USER)
+        response = self.client.get(self.history_url, {'state': 'lost', 'borrowed_after': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('state', response.data)
+        self.assertIn('borrowed_after', response.data)
+
+    def test_visitor_cannot_view_other_members(self):
+        """Ensure a visitor cannot read another member's history."""
+        self.authenticate(User.VISITOR_USER)
+        response = self.client.get(self.history_url, {'member': self.other.id})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_staff_history(self):
+        """Ensure library staff see every member's loans and can filter by member."""
+        self.authenticate(User.LIBRARY_USER)
+        visitor = User.objects.create(name='visitor', email='visitor@test.com', user_type=User.VISITOR_USER)
+        visitor_records = self.create_history(visitor)
+        other_records = self.create_history(self.other)
+
+        response = self.client.get(self.history_url)
+        self.assertEqual(len(response.data['results']), len(visitor_records) + len(other_records))
+
+        response = self.client.get(self.history_url, {'member': self.other.id})
+        self.assertEqual(self.get_ids(response), [record.id for record in other_records])
+        self.assertEqual({record['member'] for record in response.data['results']}, {self.other.id})
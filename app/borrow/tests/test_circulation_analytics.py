@@ -0,0 +1,168 @@
+from datetime import date, datetime, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from borrow.analytics import rollup_day
+from borrow.tasks import rollup_daily_circulation
+from core.models import (ArchivedBorrowRecord, Book, BorrowRecord,
+                         DailyCirculation, User)
+
+
+class CirculationRollupTests(TestCase):
+    """Tests for the nightly daily circulation rollup."""
+
+    def setUp(self):
+        self.day = date(2024, 3, 10)
+        self.book = Book.objects.create(title='Book A', author='Author A', total_copies=5, available_copies=5)
+        self.other_book = Book.objects.create(title='Book B', author='Author B', total_copies=5, available_copies=5)
+        self.members = [
+            User.objects.create(name=f'visitor{i}', email=f'visitor{i}@test.com', user_type=User.VISITOR_USER)
+            for i in range(4)
+        ]
+
+    def at(self, day, hour):
+        return timezone.make_aware(datetime(day.year, day.month, day.day, hour))
+
+    def create_record(self, book, member, borrowed_at, returned_at=None):
+        record = BorrowRecord.objects.create(book=book, member=member, due_date=borrowed_at + timedelta(days=30),
+                                             returned_at=returned_at)
+        # borrowed_at is auto_now_add, so backdate it with an update.
+        BorrowRecord.objects.filter(id=record.id).update(borrowed_at=borrowed_at)
+        return record
+
+    def create_activity(self):
+        previous = self.day - timedelta(days=1)
+        # Borrowed on the day and still out.
+        self.create_record(self.book, self.members[0], self.at(self.day, 9))
+        # Borrowed two days before, returned on the day.
+        self.create_record(self.book, self.members[1], self.at(previous - timedelta(days=1), 12),
+                           self.at(self.day, 12))
+        # Borrowed and returned on the day, 6 hours later.
+        self.create_record(self.other_book, self.members[2], self.at(self.day, 8), self.at(self.day, 14))
+        # Activity on other days only.
+        self.create_record(self.other_book, self.members[3], self.at(previous, 10),
+                           self.at(self.day + timedelta(days=1), 10))
+
+    def test_rollup_day(self):
+        """Ensure a day's borrows, returns and loan durations are counted per book."""
+        self.create_activity()
+
+        self.assertEqual(rollup_day(self.day), 2)
+
+        book = DailyCirculation.objects.get(day=self.day, book=self.book)
+        self.assertEqual((book.borrowed_count, book.returned_count, book.loan_seconds), (1, 1, 2 * 86400))
+        other = DailyCirculation.objects.get(day=self.day, book=self.other_book)
+        self.assertEqual((other.borrowed_count, other.returned_count, other.loan_seconds), (1, 1, 6 * 3600))
+
+    def test_rollup_includes_archived_records(self):
+        """Ensure loans already moved to the archive are still counted."""
+        ArchivedBorrowRecord.objects.create(id=999, book=self.book, member=self.members[0],
+                                            borrowed_at=self.at(self.day, 9), due_date=self.at(self.day, 9),
+                                            returned_at=self.at(self.day, 10))
+        rollup_day(self.day)
+
+        row = DailyCirculation.objects.get(day=self.day, book=self.book)
+        self.assertEqual((row.borrowed_count, row.returned_count, row.loan_seconds), (1, 1, 3600))
+
+    def test_rollup_rerun_replaces_day(self):
+        """Ensure rerunning a day replaces its rows instead of adding to them."""
+        self.create_activity()
+        rollup_day(self.day)
+        BorrowRecord.objects.filter(book=self.other_book).delete()
+
+        self.assertEqual(rollup_day(self.day), 1)
+        self.assertEqual(list(DailyCirculation.objects.values_list('book_id', 'borrowed_count')), [(self.book.id, 1)])
+
+    def test_task_defaults_to_yesterday(self):
+        """Ensure the beat task rolls up the previous day."""
+        yesterday = timezone.localdate() - timedelta(days=1)
+        self.create_record(self.book, self.members[0], self.at(yesterday, 9))
+
+        self.assertEqual(rollup_daily_circulation(), 1)
+        self.assertTrue(DailyCirculation.objects.filter(day=yesterday, borrowed_count=1).exists())
+        self.assertEqual(rollup_daily_circulation(self.day.isoformat()), 0)
+
+    def test_backfill_command(self):
+        """Ensure the command rolls up every day of a range."""
+        self.create_activity()
+        out = StringIO()
+        call_command('rollup_circulation', start='2024-03-08', end='2024-03-11', stdout=out)
+
+        self.assertEqual(DailyCirculation.objects.filter(day=date(2024, 3, 9)).count(), 1)
+        self.assertEqual(DailyCirculation.objects.filter(day=date(2024, 3, 11)).count(), 1)
+        self.assertIn('Rolled up circulation from 2024-03-08 to 2024-03-11.', out.getvalue())
+
+
+class CirculationAnalyticsApiTests(TestCase):
+    """Tests for the staff circulation analytics endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('borrow:circulation-analytics')
+        self.staff = User.objects.create(name='staff', email='staff@test.com', user_type=User.LIBRARY_USER)
+        self.books = [
+            Book.objects.create(title=f'Book {i}', author=f'Author {i}', total_copies=5, available_copies=5)
+            for i in range(3)
+        ]
+        DailyCirculation.objects.bulk_create([
+            DailyCirculation(day=date(2024, 3, 1), book=self.books[0], borrowed_count=2, returned_count=1,
+                             loan_seconds=86400),
+            DailyCirculation(day=date(2024, 3, 1), book=self.books[1], borrowed_count=3),
+            DailyCirculation(day=date(2024, 3, 3), book=self.books[0], borrowed_count=2, returned_count=3,
+                             loan_seconds=5 * 86400),
+            DailyCirculation(day=date(2024, 3, 3), book=self.books[2], returned_count=1),
+            DailyCirculation(day=date(2024, 4, 1), book=self.books[2], borrowed_count=9),
+        ])
+
+    def test_report(self):
+        """Ensure the report sums the rollups of the requested range."""
+        self.client.force_authenticate(self.staff)
+        response = self.client.get(self.url, {'start': '2024-03-01', 'end': '2024-03-03', 'limit': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_borrowed'], 7)
+        self.assertEqual(response.data['total_returned'], 5)
+        self.assertEqual(response.data['average_loan_days'], 1.2)
+        self.assertEqual(response.data['loans_per_day'], [
+            {'day': date(2024, 3, 1), 'borrowed': 5, 'returned': 1},
+            {'day': date(2024, 3, 2), 'borrowed': 0, 'returned': 0},
+            {'day': date(2024, 3, 3), 'borrowed': 2, 'returned': 4},
+        ])
+        self.assertEqual(response.data['most_borrowed'], [
+            {'book': {'id': self.books[0].id, 'title': 'Book 0', 'author': 'Author 0'}, 'borrowed': 4},
+            {'book': {'id': self.books[1].id, 'title': 'Book 1', 'author': 'Author 1'}, 'borrowed': 3},
+        ])
+
+    def test_report_reads_rollups_only(self):
+        """Ensure the report costs a fixed number of queries and never touches the borrow records."""
+        self.client.force_authenticate(self.staff)
+        with self.assertNumQueries(3) as context:
+            self.client.get(self.url, {'start': '2024-01-01', 'end': '2024-12-31'})
+        self.assertFalse(any('core_borrowrecord' in query['sql'] for query in context.captured_queries))
+
+    def test_empty_report(self):
+        """Ensure a range without activity has no average loan duration."""
+        self.client.force_authenticate(self.staff)
+        response = self.client.get(self.url, {'start': '2023-01-01', 'end': '2023-01-02'})
+        self.assertIsNone(response.data['average_loan_days'])
+        self.assertEqual(response.data['most_borrowed'], [])
+
+    def test_invalid_range(self):
+        """Ensure reversed and overlong ranges are rejected."""
+        self.client.force_authenticate(self.staff)
+        response = self.client.get(self.url, {'start': '2024-03-03', 'end': '2024-03-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {'start': '2020-01-01', 'end': '2024-03-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_forbidden_for_visitors(self):
+        """Ensure visitors cannot read the analytics."""
+        visitor = User.objects.create(name='visitor', email='visitor@test.com', user_type=User.VISITOR_USER)
+        self.client.force_authenticate(visitor)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,94 @@
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from borrow.notifications import get_staff_emails
+from borrow.tasks import send_staff_digest
+from core.models import NotificationEvent, OutboxMessage, User
+
+from .test_borrow_api import BorrowBookApiTestsBase
+
+
+class StaffEmailsTests(TestCase):
+    """Tests for the cached library staff recipient list."""
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.staff = User.objects.create(name='staff', email='staff@test.com', user_type=User.LIBRARY_USER)
+            User.objects.create(name='visitor', email='visitor@test.com', user_type=User.VISITOR_USER)
+
+    def test_staff_emails_are_cached(self):
+        """Ensure only the first lookup queries the database."""
+        self.assertEqual(get_staff_emails(), ['staff@test.com'])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_staff_emails(), ['staff@test.com'])
+
+    def test_new_staff_invalidates(self):
+        """Ensure a newly created staff member is picked up."""
+        get_staff_emails()
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create(name='other', email='other@test.com', user_type=User.LIBRARY_USER)
+        self.assertEqual(sorted(get_staff_emails()), ['other@test.com', 'staff@test.com'])
+
+    def test_changed_user_type_invalidates(self):
+        """Ensure a staff member turned visitor is dropped."""
+        get_staff_emails()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.staff.user_type = User.VISITOR_USER
+            self.staff.save()
+        self.assertEqual(get_staff_emails(), [])
+
+    def test_deleted_staff_invalidates(self):
+        """Ensure a deleted staff member is dropped."""
+        get_staff_emails()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.staff.delete()
+        self.assertEqual(get_staff_emails(), [])
+
+
+@override_settings(STAFF_NOTIFICATION_MODE='digest')
+class StaffDigestTests(BorrowBookApiTestsBase):
+    """Tests for batching staff notifications into a periodic digest."""
+
+    def setUp(self):
+        super().setUp()
+        User.objects.create(name='staff', email='staff@test.com', user_type=User.LIBRARY_USER)
+        with patch('user.tasks.send_activation_email.delay'):
+            self.register_user(user_type=User.VISITOR_USER)
+        user = User.objects.get(email=self.user_data['email'])
+        user.is_active = True
+        user.save()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.get_token()}')
+
+    def test_events_are_stored_instead_of_emailed(self):
+        """Ensure only the member is emailed right away and staff events are stored."""
+        self.borrow_book()
+        self.return_book()
+
+        recipients = list(OutboxMessage.objects.values_list('recipient_list', flat=True))
+        self.assertEqual(recipients, [[self.user_data['email']], [self.user_data['email']]])
+        self.assertEqual(list(NotificationEvent.objects.values_list('kind', flat=True)),
+                         [NotificationEvent.BORROWED, NotificationEvent.RETURNED])
+
+    @patch('borrow.tasks.send_notification_email.delay')
+    def test_digest_sends_one_summary(self, mock_send_notification_email):
+        """Ensure the digest task sends one email covering all events and clears them."""
+        self.borrow_book()
+        self.return_book()
+
+        sent = send_staff_digest()
+
+        self.assertEqual(sent, 2)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['staff@test.com'])
+        self.assertIn('1 borrowed, 1 returned', mail.outbox[0].body)
+        self.assertIn("'Test Book' borrowed by testuser", mail.outbox[0].body)
+        self.assertFalse(NotificationEvent.objects.exists())
+
+    def test_digest_without_events(self):
+        """Ensure an empty interval sends nothing."""
+        self.assertEqual(send_staff_digest(), 0)
+        self.assertEqual(mail.outbox, [])
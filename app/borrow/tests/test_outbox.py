@@ -0,0 +1,111 @@
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import transaction
+from django.test import TestCase
+
+from borrow import notifications
+from borrow.tasks import OUTBOX_MAX_ATTEMPTS, dispatch_outbox
+from borrow.tests.test_borrow_api import BorrowBookApiTestsBase
+from core.models import OutboxMessage, User
+
+
+class OutboxDispatchTests(TestCase):
+    """Tests for queuing notification emails in the outbox and dispatching them."""
+
+    def enqueue(self, count):
+        notifications.enqueue(
+            (f'Subject {i}', f'Message {i}', 'library@test.com', [f'member{i}@test.com']) for i in range(count)
+        )
+
+    def test_enqueue_skips_messages_without_recipients(self):
+        """Ensure messages with an empty recipient list are not stored."""
+        notifications.enqueue([('Subject', 'Message', 'library@test.com', []),
+                               ('Subject', 'Message', 'library@test.com', ['member@test.com'])])
+        self.assertEqual(list(OutboxMessage.objects.values_list('recipient_list', flat=True)), [['member@test.com']])
+
+    def test_enqueue_rolls_back_with_transaction(self):
+        """Ensure nothing is sent for a change that did not commit."""
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.enqueue(1)
+            raise RuntimeError
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    @patch('borrow.tasks.OUTBOX_BATCH_SIZE', 2)
+    def test_dispatch_sends_and_clears(self):
+        """Ensure every queued message is sent once, in batches, and removed from the outbox."""
+        self.enqueue(5)
+
+        self.assertEqual(dispatch_outbox(), 5)
+        self.assertEqual([message.subject for message in mail.outbox], [f'Subject {i}' for i in range(5)])
+        self.assertEqual(mail.outbox[0].to, ['member0@test.com'])
+        self.assertFalse(OutboxMessage.objects.exists())
+        self.assertEqual(dispatch_outbox(), 0)
+
+    @patch('borrow.tasks.OUTBOX_BATCH_SIZE', 2)
+    def test_one_failed_message_does_not_hold_back_others(self):
+        """Ensure only the message that failed is kept and counted, and the others are sent exactly once."""
+        self.enqueue(5)
+        send_messages = EmailBackend.send_messages
+
+        def fail_for_member2(backend, messages):
+            if messages[0].to == ['member2@test.com']:
+                raise OSError
+            return send_messages(backend, messages)
+
+        with patch.object(EmailBackend, 'send_messages', fail_for_member2):
+            self.assertEqual(dispatch_outbox(), 4)
+
+        self.assertEqual(sorted(message.subject for message in mail.outbox),
+                         ['Subject 0', 'Subject 1', 'Subject 3', 'Subject 4'])
+        self.assertEqual(list(OutboxMessage.objects.values_list('subject', 'attempts')), [('Subject 2', 1)])
+
+        self.assertEqual(dispatch_outbox(), 1)
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_failed_send_is_retried(self):
+        """Ensure a failed batch stays queued with its attempts counted, until it has failed too often."""
+        self.enqueue(2)
+
+        with patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError):
+            self.assertEqual(dispatch_outbox(), 0)
+        self.assertEqual(list(OutboxMessage.objects.values_list('attempts', flat=True)), [1, 1])
+
+        self.assertEqual(dispatch_outbox(), 2)
+
+        self.enqueue(1)
+        OutboxMessage.objects.update(attempts=OUTBOX_MAX_ATTEMPTS)
+        self.assertEqual(dispatch_outbox(), 0)
+        self.assertTrue(OutboxMessage.objects.exists())
+
+
+class OutboxRequestTests(BorrowBookApiTestsBase):
+    """Tests that borrow and return requests queue their emails instead of calling the broker."""
+
+    def setUp(self):
+        super().setUp()
+        User.objects.create(name='staff', email='staff@test.com', user_type=User.LIBRARY_USER)
+        with patch('user.tasks.send_activation_email.delay'):
+            self.register_user(user_type=User.VISITOR_USER)
+        user = User.objects.get(email=self.user_data['email'])
+        user.is_active = True
+        user.save()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.get_token()}')
+
+    @patch('borrow.tasks.send_notification_email.delay')
+    def test_borrow_and_return_queue_emails(self, mock_send_notification_email):
+        """Ensure the member and staff emails are written to the outbox and sent by the dispatcher."""
+        self.borrow_book()
+        self.return_book()
+
+        mock_send_notification_email.assert_not_called()
+        self.assertEqual(list(OutboxMessage.objects.values_list('subject', 'recipient_list')), [
+            ('Book Borrowed', [self.user_data['email']]),
+            ('Book Borrowed Notification', ['staff@test.com']),
+            ('Book Returned', [self.user_data['email']]),
+            ('Book Returned Notification', ['staff@test.com']),
+        ])
+
+        self.assertEqual(dispatch_outbox(), 4)
+        self.assertEqual(len(mail.outbox), 4)
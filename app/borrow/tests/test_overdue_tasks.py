@@ -0,0 +1,142 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from borrow.tasks import (overdue_id_ranges, overdue_records,
+                          send_overdue_notifications,
+                          send_overdue_notifications_chunk)
+from core.models import Book, BorrowRecord, User
+
+
+class OverdueNotificationTaskTests(TestCase):
+    """Tests for the chunked overdue notification job."""
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.book = Book.objects.create(title='Test Book', author='Test Author', total_copies=20, available_copies=10)
+        self.members = [
+            User.objects.create(name=f'visitor{i}', email=f'visitor{i}@test.com', user_type=User.VISITOR_USER)
+            for i in range(7)
+        ]
+        self.overdue = [
+            BorrowRecord.objects.create(book=self.book, member=member, due_date=self.now - timedelta(days=2))
+            for member in self.members[:5]
+        ]
+        BorrowRecord.objects.create(book=self.book, member=self.members[5], due_date=self.now + timedelta(days=1))
+        BorrowRecord.objects.create(book=self.book, member=self.members[6], due_date=self.now - timedelta(days=1),
+                                    returned_at=self.now)
+
+    def test_id_ranges(self):
+        """Ensure only loans with a reminder due are split into ranges of the chunk size."""
+        ids = [record.id for record in self.overdue]
+        self.assertEqual(overdue_id_ranges(self.now, 2), [[ids[0], ids[1]], [ids[2], ids[3]], [ids[4], ids[4]]])
+
+    @override_settings(OVERDUE_REMINDER_SCHEDULE_DAYS=[1, 7, 14])
+    def test_reminder_schedule(self):
+        """Ensure a loan only becomes due for its next reminder at the next step of the schedule."""
+        record = self.overdue[0]
+        ids = overdue_records(self.now).values_list('id', flat=True)
+        self.assertIn(record.id, ids)
+
+        BorrowRecord.objects.filter(id=record.id).update(overdue_notice_count=1)
+        self.assertNotIn(record.id, ids.all())
+        self.assertIn(record.id, overdue_records(self.now + timedelta(days=5)).values_list('id', flat=True))
+
+        BorrowRecord.objects.filter(id=record.id).update(overdue_notice_count=3)
+        self.assertNotIn(record.id, overdue_records(self.now + timedelta(days=365)).values_list('id', flat=True))
+
+    @override_settings(OVERDUE_NOTIFICATION_CHUNK_SIZE=2)
+    @patch('borrow.tasks.group')
+    def test_dispatches_one_task_per_chunk(self, mock_group):
+        """Ensure the job fans out one chunk task per id range."""
+        self.assertEqual(send_overdue_notifications(), 3)
+        signatures = list(mock_group.call_args.args[0])
+        self.assertEqual([signature.args[:2] for signature in signatures],
+                         [(self.overdue[0].id, self.overdue[1].id), (self.overdue[2].id, self.overdue[3].id),
+                          (self.overdue[4].id, self.overdue[4].id)])
+        mock_group.return_value.apply_async.assert_called_once()
+
+    def test_chunk_sends_in_one_query(self):
+        """Ensure a chunk loads members and books with the loans and emails every overdue member in its range."""
+        with self.assertNumQueries(4):
+            sent = send_overdue_notifications_chunk(self.overdue[0].id, self.overdue[2].id, self.now.isoformat())
+
+        self.assertEqual(sent, 3)
+        self.assertEqual([message.to for message in mail.outbox], [[member.email] for member in self.members[:3]])
+        self.assertEqual(mail.outbox[0].subject, 'Overdue Book Notification')
+        self.assertIn("The book 'Test Book' you borrowed is overdue.", mail.outbox[0].body)
+
+    def test_chunk_records_reminder(self):
+        """Ensure a sent reminder is recorded so a retried chunk sends nothing."""
+        args = (self.overdue[0].id, self.overdue[1].id, self.now.isoformat())
+        self.assertEqual(send_overdue_notifications_chunk(*args), 2)
+        self.assertEqual(send_overdue_notifications_chunk(*args), 0)
+        self.assertEqual(len(mail.outbox), 2)
+
+        record = BorrowRecord.objects.get(id=self.overdue[0].id)
+        self.assertEqual(record.overdue_notice_count, 1)
+        self.assertEqual(record.last_overdue_notified_at, self.now)
+        self.assertEqual(BorrowRecord.objects.get(id=self.overdue[2].id).overdue_notice_count, 0)
+
+    def test_chunk_only_records_sent_reminders(self):
+        """Ensure a failing reminder leaves its loan due without holding back or resending the others."""
+        send_messages = EmailBackend.send_messages
+
+        def fail_for_visitor1(backend, messages):
+            if messages[0].to == ['visitor1@test.com']:
+                raise OSError
+            return send_messages(backend, messages)
+
+        args = (self.overdue[0].id, self.overdue[2].id, self.now.isoformat())
+        with patch.object(EmailBackend, 'send_messages', fail_for_visitor1):
+            self.assertEqual(send_overdue_notifications_chunk(*args), 2)
+
+        counts = dict(BorrowRecord.objects.filter(id__in=[record.id for record in self.overdue[:3]])
+                      .values_list('member__email', 'overdue_notice_count'))
+        self.assertEqual(counts, {'visitor0@test.com': 1, 'visitor1@test.com': 0, 'visitor2@test.com': 1})
+
+        self.assertEqual(send_overdue_notifications_chunk(*args), 1)
+        self.assertEqual([message.to for message in mail.outbox],
+                         [['visitor0@test.com'], ['visitor2@test.com'], ['visitor1@test.com']])
+
+    @override_settings(OVERDUE_REMINDER_SCHEDULE_DAYS=[1, 7, 14])
+    def test_chunk_skips_passed_steps(self):
+        """Ensure a loan already several steps overdue gets one reminder for them, not one per night."""
+        long_overdue, week_overdue = self.overdue[:2]
+        BorrowRecord.objects.filter(id=long_overdue.id).update(due_date=self.now - timedelta(days=20))
+        BorrowRecord.objects.filter(id=week_overdue.id).update(due_date=self.now - timedelta(days=8))
+
+        self.assertEqual(send_overdue_notifications_chunk(long_overdue.id, week_overdue.id, self.now.isoformat()), 2)
+
+        counts = dict(BorrowRecord.objects.filter(id__in=[long_overdue.id, week_overdue.id])
+                      .values_list('id', 'overdue_notice_count'))
+        self.assertEqual(counts, {long_overdue.id: 3, week_overdue.id: 2})
+        ids = overdue_records(self.now + timedelta(days=6)).values_list('id', flat=True)
+        self.assertEqual(set(ids) & {long_overdue.id, week_overdue.id}, {week_overdue.id})
+
+    def test_chunk_sends_outside_lock(self):
+        """Ensure loans are marked as reminded and their locks released before any email is sent."""
+        test_depth = len(connection.atomic_blocks)
+        claims = []
+
+        def check_claimed(backend, messages):
+            claims.append((len(connection.atomic_blocks),
+                           BorrowRecord.objects.get(id=self.overdue[0].id).overdue_notice_count))
+            return len(messages)
+
+        with patch.object(EmailBackend, 'send_messages', check_claimed):
+            self.assertEqual(send_overdue_notifications_chunk(self.overdue[0].id, self.overdue[0].id,
+                                                              self.now.isoformat()), 1)
+        self.assertEqual(claims, [(test_depth, 1)])
+
+    def test_chunk_skips_loans_no_longer_overdue(self):
+        """Ensure a loan returned after dispatch is not reminded."""
+        BorrowRecord.objects.filter(id=self.overdue[0].id).update(returned_at=self.now)
+        sent = send_overdue_notifications_chunk(self.overdue[0].id, self.overdue[0].id, self.now.isoformat())
+        self.assertEqual(sent, 0)
+        self.assertEqual(mail.outbox, [])
@@ -1,7 +1,8 @@
 from django.urls import path
 
-from .views import (BorrowBookView, MyBorrowedBooksView, ReturnBookView,
-                    UserBorrowedBooksView)
+from .views import (BatchBorrowBookView, BatchReturnBookView, BorrowBookView,
+                    BorrowHistoryView, CirculationAnalyticsView, HoldBookView,
+                    MyBorrowedBooksView, ReturnBookView, UserBorrowedBooksView)
 
 app_name = 'borrow'
 
@@ -12,6 +13,11 @@ URL patterns for borrow-related operations.
 urlpatterns = [
     path('borrow/<int:pk>/', BorrowBookView.as_view(), name='borrow-book'),
     path('return/<int:pk>/', ReturnBookView.as_view(), name='return-book'),
+    path('hold/<int:pk>/', HoldBookView.as_view(), name='hold-book'),
+    path('borrow/batch/', BatchBorrowBookView.as_view(), name='borrow-batch'),
+    path('return/batch/', BatchReturnBookView.as_view(), name='return-batch'),
     path('user-borrowed-books/<int:user_id>/', UserBorrowedBooksView.as_view(), name='user-borrowed-books'),
     path('my-borrowed-books/', MyBorrowedBooksView.as_view(), name='my-borrowed-books'),
+    path('borrow-history/', BorrowHistoryView.as_view(), name='borrow-history'),
+    path('analytics/circulation/', CirculationAnalyticsView.as_view(), name='circulation-analytics'),
 ]
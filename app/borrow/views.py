@@ -1,4 +1,5 @@
-from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import F
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from rest_framework import status
@@ -6,14 +7,24 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from core.models import Book, BorrowRecord, User
+from books import cache as book_cache
+from core.models import (ArchivedBorrowRecord, Book, BookHold, BorrowRecord,
+                         User)
+from core.throttling import UserTokenBucketThrottle
 
-from .serializers import BorrowRecordSerializer
-from .tasks import send_notification_email
+from . import analytics, holds, notifications
+from .pagination import BorrowHistoryPagination
+from .serializers import (BookBatchSerializer, BookHoldSerializer,
+                          BorrowHistoryFilterSerializer,
+                          BorrowRecordSerializer,
+                          CirculationReportFilterSerializer,
+                          ExpandedBorrowRecordSerializer)
 
 
 class BorrowBookView(APIView):
     permission_classes = (IsAuthenticated,)
+    throttle_classes = (UserTokenBucketThrottle,)
+    throttle_scope = 'borrow'
 
     def post(self, request, pk):
         """
@@ -24,37 +35,26 @@ class BorrowBookView(APIView):
             return Response({'detail': 'You do not have permission to borrow books.'},
                             status=status.HTTP_403_FORBIDDEN)
 
-        book = get_object_or_404(Book, pk=pk)
-
-        if book.available_copies <= 0:
-            return Response({'detail': 'No copies of this book are available.'},
-                            status=status.HTTP_400_BAD_REQUEST)
-
-        if BorrowRecord.objects.filter(book=book, member=request.user, returned_at__isnull=True).exists():
+        # Reserve a copy and record the loan in one transaction. The conditional UPDATE cannot oversell under
+        # concurrency, and the partial unique constraint rejects a second open loan of the same book.
+        try:
+            with transaction.atomic():
+                reserved = Book.objects.filter(pk=pk, available_copies__gt=0).update(
+                    available_copies=F('available_copies') - 1,
+                    updated_at=timezone.now(),
+                )
+                if reserved:
+                    borrow_record = BorrowRecord.objects.create(book_id=pk, member=request.user)
+                    notifications.enqueue(notifications.borrowed_messages(request.user, [borrow_record.book.title]))
+                    book_cache.invalidate()
+        except IntegrityError:
             return Response({'detail': 'You have already borrowed this book.'},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        borrow_record = BorrowRecord(book=book, member=request.user)
-        borrow_record.save()
-
-        book.available_copies -= 1
-        book.save()
-
-        send_notification_email.delay(
-            subject='Book Borrowed',
-            message=f'You have successfully borrowed the book: {book.title}.',
-            recipient_list=[request.user.email]
-        )
-
-        User = get_user_model()
-        library_users = User.objects.filter(user_type=User.LIBRARY_USER)
-
-        library_emails = [user.email for user in library_users]
-        send_notification_email.delay(
-            subject="Book Borrowed Notification",
-            message=f"The book '{book.title}' was borrowed by {request.user.name} (Email: {request.user.email}).",
-            recipient_list=library_emails
-        )
+        if not reserved:
+            get_object_or_404(Book, pk=pk)
+            return Response({'detail': 'No copies of this book are available.'},
+                            status=status.HTTP_400_BAD_REQUEST)
 
         serializer = BorrowRecordSerializer(borrow_record)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -66,43 +66,83 @@ class ReturnBookView(APIView):
     def post(self, request, pk):
         """
         Return a borrowed book. Only visitors can return books.
-        Sends notification emails to the user and library staff.
+        Sends notification emails to the user and library staff. If other members hold the book, the copy is lent to
+        the one who has waited longest, and only that member is notified.
         """
         if request.user.user_type != request.user.VISITOR_USER:
             return Response({'detail': 'You do not have permission to return books.'},
                             status=status.HTTP_403_FORBIDDEN)
 
-        try:
-            borrow_record = BorrowRecord.objects.get(book_id=pk, member=request.user, returned_at__isnull=True)
-        except BorrowRecord.DoesNotExist:
-            return Response({'detail': 'No record found for this book or you have already returned it.'},
-                            status=status.HTTP_404_NOT_FOUND)
+        with transaction.atomic():
+            # Lock the book before the loan, the same order as every borrow, return and hold view takes them in, so
+            # concurrent single and batch requests for the same book cannot deadlock.
+            list(Book.objects.select_for_update().filter(pk=pk).values_list('id', flat=True))
+            try:
+                borrow_record = BorrowRecord.objects.select_for_update(of=('self',)).select_related('book').get(
+                    book_id=pk, member=request.user, returned_at__isnull=True)
+            except BorrowRecord.DoesNotExist:
+                return Response({'detail': 'No record found for this book or you have already returned it.'},
+                                status=status.HTTP_404_NOT_FOUND)
+
+            borrow_record.returned_at = timezone.now()
+            borrow_record.save(update_fields=['returned_at'])
+            Book.objects.filter(pk=pk).update(
+                available_copies=F('available_copies') + 1,
+                updated_at=borrow_record.returned_at,
+            )
+            holder = holds.allocate_returned_copy(pk)
+            messages = notifications.returned_messages(request.user, [borrow_record.book.title])
+            if holder is not None:
+                messages.extend(notifications.hold_messages(holder, [borrow_record.book.title]))
+            notifications.enqueue(messages)
+            book_cache.invalidate()
 
-        borrow_record.returned_at = timezone.now()
-        borrow_record.save()
+        serializer = BorrowRecordSerializer(borrow_record)
+        return Response(serializer.data, status=status.HTTP_200_OK)
 
-        book = borrow_record.book
-        book.available_copies += 1
-        book.save()
 
-        send_notification_email.delay(
-            subject="Book Returned",
-            message=f"You have successfully returned the book: {book.title}.",
-            recipient_list=[request.user.email]
-        )
+class HoldBookView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request, pk):
+        """
+        Join the queue for a book that has no available copies. Only visitors can hold books.
+        When a copy is returned it is borrowed for the member who has waited longest, who is then notified,
+        so there is no need to poll the book.
+        """
+        if request.user.user_type != request.user.VISITOR_USER:
+            return Response({'detail': 'You do not have permission to hold books.'},
+                            status=status.HTTP_403_FORBIDDEN)
 
-        User = get_user_model()
-        library_users = User.objects.filter(user_type=User.LIBRARY_USER)
+        try:
+            with transaction.atomic():
+                # Locking the book orders this against a concurrent return, which updates the same row before it
+                # serves the queue.
+                book = get_object_or_404(Book.objects.select_for_update(), pk=pk)
+                if book.available_copies > 0:
+                    return Response({'detail': 'Copies of this book are available; borrow it instead.'},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                if BorrowRecord.objects.filter(book=book, member=request.user, returned_at__isnull=True).exists():
+                    return Response({'detail': 'You have already borrowed this book.'},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                hold = BookHold.objects.create(book=book, member=request.user)
+        except IntegrityError:
+            return Response({'detail': 'You are already waiting for this book.'},
+                            status=status.HTTP_400_BAD_REQUEST)
 
-        library_emails = [user.email for user in library_users]
-        send_notification_email.delay(
-            subject="Book Returned Notification",
-            message=f"The book '{book.title}' was returned by {request.user.name} (Email: {request.user.email}).",
-            recipient_list=library_emails
-        )
+        hold.position = holds.queue_position(hold)
+        serializer = BookHoldSerializer(hold)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        serializer = BorrowRecordSerializer(borrow_record)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    def delete(self, request, pk):
+        """
+        Leave the queue for a book.
+        """
+        deleted, _ = BookHold.objects.filter(book_id=pk, member=request.user).delete()
+        if not deleted:
+            return Response({'detail': 'You are not waiting for this book.'},
+                            status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class UserBorrowedBooksView(APIView):
@@ -111,6 +151,7 @@ class UserBorrowedBooksView(APIView):
     def get(self, request, user_id):
         """
         Retrieve all borrowed books for a specific user. Only library staff can access this.
+        With ``?expand=book`` each record embeds the book's id, title and author instead of its id.
         """
         if request.user.user_type != request.user.LIBRARY_USER:
             return Response({'detail': 'You do not have permission to view borrowed books.'},
@@ -126,14 +167,14 @@ class UserBorrowedBooksView(APIView):
             return Response({'detail': 'This user is a library staff member.'},
                             status=status.HTTP_403_FORBIDDEN)
 
-        borrowed_books = BorrowRecord.objects.filter(member_id=user_id, returned_at__isnull=True)
+        records = BorrowRecord.objects.filter(member_id=user_id, returned_at__isnull=True)
+        borrowed_books = _borrowed_books(request, records)
 
-        if not borrowed_books.exists():
+        if not borrowed_books:
             return Response({'detail': 'No borrowed books found for this user.'},
                             status=status.HTTP_404_NOT_FOUND)
 
-        serializer = BorrowRecordSerializer(borrowed_books, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(borrowed_books, status=status.HTTP_200_OK)
 
 
 class MyBorrowedBooksView(APIView):
@@ -142,16 +183,205 @@ class MyBorrowedBooksView(APIView):
     def get(self, request):
         """
         Retrieve all borrowed books for the authenticated user.
+        With ``?expand=book`` each record embeds the book's id, title and author instead of its id.
         """
         if request.user.user_type == request.user.LIBRARY_USER:
             return Response({'detail': 'You do not have permission to view borrowed books.'},
                             status=status.HTTP_403_FORBIDDEN)
 
-        borrowed_books = BorrowRecord.objects.filter(member=request.user, returned_at__isnull=True)
+        records = BorrowRecord.objects.filter(member=request.user, returned_at__isnull=True)
+        borrowed_books = _borrowed_books(request, records)
 
-        if not borrowed_books.exists():
+        if not borrowed_books:
             return Response({'detail': 'No borrowed books found for you.'},
                             status=status.HTTP_404_NOT_FOUND)
 
-        serializer = BorrowRecordSerializer(borrowed_books, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(borrowed_books, status=status.HTTP_200_OK)
+
+
+class BorrowHistoryView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        """
+        List past and current loans one page at a time, most recent first, each with its book's title and author.
+        Visitors see their own loans; library staff see every loan and can narrow it down with ``?member=``.
+        Filters: ``borrowed_after``/``borrowed_before`` (ISO 8601 datetimes), ``state`` (open, returned), ``book``.
+        Pass the opaque ``next`` link (``?cursor=``) to fetch the following page and ``page_size`` to resize it.
+        Archived loans are merged in, so the history is complete.
+        """
+        filters = BorrowHistoryFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+
+        querysets = [BorrowRecord.objects.select_related('book')]
+        if filters.validated_data.get('state') != BorrowHistoryFilterSerializer.OPEN:
+            querysets.append(ArchivedBorrowRecord.objects.select_related('book'))
+
+        if request.user.user_type != request.user.LIBRARY_USER:
+            if filters.validated_data.get('member', request.user.id) != request.user.id:
+                return Response({'detail': 'You do not have permission to view other users\' borrow history.'},
+                                status=status.HTTP_403_FORBIDDEN)
+            querysets = [queryset.filter(member=request.user) for queryset in querysets]
+
+        paginator = BorrowHistoryPagination()
+        page = paginator.paginate_querysets([filters.filter_queryset(queryset) for queryset in querysets], request)
+        return paginator.get_paginated_response(ExpandedBorrowRecordSerializer(page, many=True).data)
+
+
+class CirculationAnalyticsView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        """
+        Report loans per day, the most borrowed books and the average loan duration. Only library staff can access this.
+        Optional query params: ``start`` and ``end`` (dates, default the last 30 full days) and ``limit`` for the
+        number of most borrowed books. Figures come from the nightly daily rollups, so today is not included.
+        """
+        if request.user.user_type != request.user.LIBRARY_USER:
+            return Response({'detail': 'You do not have permission to view circulation analytics.'},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        filters = CirculationReportFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        data = filters.validated_data
+        report = analytics.circulation_report(data['start'], data['end'],
+                                              data.get('limit', analytics.MOST_BORROWED_LIMIT))
+        return Response(report, status=status.HTTP_200_OK)
+
+
+class BatchBorrowBookView(APIView):
+    permission_classes = (IsAuthenticated,)
+    throttle_classes = (UserTokenBucketThrottle,)
+    throttle_scope = 'borrow'
+
+    def post(self, request):
+        """
+        Borrow several books at once. Only visitors can borrow books.
+        POST request data should include 'book_ids'. Every book is reported as borrowed or failed with a reason,
+        and a single combined notification is sent to the user and library staff.
+        """
+        if request.user.user_type != request.user.VISITOR_USER:
+            return Response({'detail': 'You do not have permission to borrow books.'},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        serializer = BookBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        book_ids = serializer.validated_data['book_ids']
+
+        with transaction.atomic():
+            # Locking in id order keeps concurrent batches from deadlocking on each other.
+            books = {book.id: book for book in Book.objects.select_for_update().filter(id__in=book_ids).order_by('id')}
+            already_borrowed = set(BorrowRecord.objects.filter(
+                member=request.user, book_id__in=book_ids, returned_at__isnull=True).values_list('book_id', flat=True))
+
+            failures = {}
+            to_borrow = []
+            for book_id in book_ids:
+                book = books.get(book_id)
+                if book is None:
+                    failures[book_id] = 'Book not found.'
+                elif book_id in already_borrowed:
+                    failures[book_id] = 'You have already borrowed this book.'
+                elif book.available_copies <= 0:
+                    failures[book_id] = 'No copies of this book are available.'
+                else:
+                    to_borrow.append(book)
+
+            records = {}
+            if to_borrow:
+                now = timezone.now()
+                Book.objects.filter(id__in=[book.id for book in to_borrow]).update(
+                    available_copies=F('available_copies') - 1,
+                    updated_at=now,
+                )
+                due_date = now + BorrowRecord.LOAN_PERIOD
+                created = BorrowRecord.objects.bulk_create(
+                    BorrowRecord(book=book, member=request.user, borrowed_at=now, due_date=due_date)
+                    for book in to_borrow
+                )
+                records = {record.book_id: record for record in created}
+                notifications.enqueue(notifications.borrowed_messages(request.user, [book.title for book in to_borrow]))
+                book_cache.invalidate()
+
+        return Response({'results': _batch_results(book_ids, records, failures)}, status=status.HTTP_200_OK)
+
+
+class BatchReturnBookView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        """
+        Return several borrowed books at once. Only visitors can return books.
+        POST request data should include 'book_ids'. Every book is reported as returned or failed with a reason,
+        and a single combined notification is sent to the user and library staff.
+        Held books are lent to the head of their queue, as with a single return.
+        """
+        if request.user.user_type != request.user.VISITOR_USER:
+            return Response({'detail': 'You do not have permission to return books.'},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        serializer = BookBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        book_ids = serializer.validated_data['book_ids']
+
+        with transaction.atomic():
+            # Lock the books in id order before the loans, like a batch checkout and a single return, so none of them
+            # can deadlock with another.
+            list(Book.objects.select_for_update().filter(id__in=book_ids).order_by('id').values_list('id', flat=True))
+            records = {
+                record.book_id: record
+                for record in BorrowRecord.objects.select_for_update(of=('self',)).select_related('book').filter(
+                    member=request.user, book_id__in=book_ids, returned_at__isnull=True)
+            }
+
+            if records:
+                now = timezone.now()
+                BorrowRecord.objects.filter(id__in=[record.id for record in records.values()]).update(returned_at=now)
+                Book.objects.filter(id__in=list(records)).update(
+                    available_copies=F('available_copies') + 1,
+                    updated_at=now,
+                )
+                for record in records.values():
+                    record.returned_at = now
+                holders = {}
+                for book_id in records:
+                    holder = holds.allocate_returned_copy(book_id)
+                    if holder is not None:
+                        holders.setdefault(holder.id, (holder, []))[1].append(records[book_id].book.title)
+
+                messages = notifications.returned_messages(
+                    request.user, [records[book_id].book.title for book_id in book_ids if book_id in records])
+                for holder, titles in holders.values():
+                    messages.extend(notifications.hold_messages(holder, titles))
+                notifications.enqueue(messages)
+                book_cache.invalidate()
+
+        failures = {
+            book_id: 'No record found for this book or you have already returned it.'
+            for book_id in book_ids if book_id not in records
+        }
+
+        return Response({'results': _batch_results(book_ids, records, failures)}, status=status.HTTP_200_OK)
+
+
+def _borrowed_books(request, records):
+    """
+    Serialize open loans in a single query, nesting the books when the request asks for ``?expand=book``.
+    """
+    if request.query_params.get('expand') == 'book':
+        return ExpandedBorrowRecordSerializer(records.select_related('book'), many=True).data
+    return BorrowRecordSerializer(records, many=True).data
+
+
+def _batch_results(book_ids, records, failures):
+    """
+    Build the per-book outcome list of a batch request, in the order the books were given.
+    """
+    results = []
+    for book_id in book_ids:
+        if book_id in records:
+            results.append({'book': book_id, 'success': True,
+                            'record': BorrowRecordSerializer(records[book_id]).data})
+        else:
+            results.append({'book': book_id, 'success': False, 'detail': failures[book_id]})
+    return results
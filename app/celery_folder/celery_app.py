@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 
 from celery import Celery
 from celery.schedules import crontab
@@ -12,10 +13,35 @@ app.config_from_object('django.conf:settings')
 app.conf.broker_url = settings.CELERY_BROKER_URL
 app.autodiscover_tasks()
 
-# Daily at midnight.
 app.conf.beat_schedule = {
+    # Sends the notification emails queued in the outbox by borrow and return requests.
+    'dispatch-outbox': {
+        'task': 'borrow.tasks.dispatch_outbox',
+        'schedule': timedelta(seconds=settings.OUTBOX_DISPATCH_INTERVAL_SECONDS),
+    },
+    # Daily at midnight.
     'run-periodic-task-every-minute': {
         'task': 'borrow.tasks.send_overdue_notifications',
         'schedule': crontab(hour='0', minute='0'),  # crontab(minute='*/1')
     },
+    # Flushes staff digest events; a no-op unless STAFF_NOTIFICATION_MODE is 'digest'.
+    'send-staff-digest': {
+        'task': 'borrow.tasks.send_staff_digest',
+        'schedule': timedelta(minutes=settings.STAFF_DIGEST_INTERVAL_MINUTES),
+    },
+    # Daily at 00:30, once the previous day is complete.
+    'rollup-daily-circulation': {
+        'task': 'borrow.tasks.rollup_daily_circulation',
+        'schedule': crontab(hour='0', minute='30'),
+    },
+    # Daily at 03:00, away from the overdue notifications.
+    'archive-borrow-records': {
+        'task': 'borrow.tasks.archive_borrow_records',
+        'schedule': crontab(hour='3', minute='0'),
+    },
+    # Daily at 04:00.
+    'prune-refresh-tokens': {
+        'task': 'user.tasks.prune_refresh_tokens',
+        'schedule': crontab(hour='4', minute='0'),
+    },
 }
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Book, BorrowRecord, User
+from .models import (ArchivedBorrowRecord, Book, BookHold, BorrowRecord,
+                     OutboxMessage, User)
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -30,6 +31,41 @@ class BorrowRecordAdmin(admin.ModelAdmin):
     list_filter = ('borrowed_at', 'returned_at')
 
 
+class BookHoldAdmin(admin.ModelAdmin):
+    """
+    Admin interface for managing BookHold model.
+    """
+    list_display = ('book', 'member', 'created_at')
+    search_fields = ('book__title', 'member__email')
+
+
+class ArchivedBorrowRecordAdmin(admin.ModelAdmin):
+    """
+    Read-only admin interface for returned borrow records moved to the archive.
+    """
+    list_display = ('book', 'member', 'borrowed_at', 'due_date', 'returned_at', 'archived_at')
+    search_fields = ('book__title', 'member__email')
+    list_filter = ('borrowed_at', 'returned_at')
+    list_select_related = ('book', 'member')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class OutboxMessageAdmin(admin.ModelAdmin):
+    """
+    Admin interface for notification emails waiting in the outbox, including ones that failed too often to retry.
+    """
+    list_display = ('subject', 'recipient_list', 'attempts', 'created_at')
+    list_filter = ('attempts',)
+
+
 admin.site.register(User, UserAdmin)
 admin.site.register(Book, BookAdmin)
 admin.site.register(BorrowRecord, BorrowRecordAdmin)
+admin.site.register(BookHold, BookHoldAdmin)
+admin.site.register(ArchivedBorrowRecord, ArchivedBorrowRecordAdmin)
+admin.site.register(OutboxMessage, OutboxMessageAdmin)
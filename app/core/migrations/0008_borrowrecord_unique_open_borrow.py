@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-17 22:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_book_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='borrowrecord',
+            constraint=models.UniqueConstraint(condition=models.Q(('returned_at__isnull', True)), fields=('book', 'member'), name='unique_open_borrow_per_member'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-17 22:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_borrowrecord_unique_open_borrow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.SmallIntegerField(choices=[(0, 'BORROWED'), (1, 'RETURNED')])),
+                ('book_title', models.CharField(max_length=255)),
+                ('member_name', models.CharField(max_length=255)),
+                ('member_email', models.EmailField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Notification Event',
+                'verbose_name_plural': 'Notification Events',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-17 22:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_notificationevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='borrowrecord',
+            name='last_overdue_notified_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='borrowrecord',
+            name='overdue_notice_count',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='borrowrecord',
+            index=models.Index(condition=models.Q(('returned_at__isnull', True)), fields=['due_date'], name='borrow_open_due_date_idx'),
+        ),
+    ]
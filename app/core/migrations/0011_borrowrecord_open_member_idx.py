@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-17 22:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_borrowrecord_overdue_tracking'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='borrowrecord',
+            index=models.Index(condition=models.Q(('returned_at__isnull', True)), fields=['member', 'borrowed_at'], name='borrow_open_member_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-17 22:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_borrowrecord_open_member_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='borrowrecord',
+            index=models.Index(fields=['borrowed_at', 'id'], name='borrow_history_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2 on 2026-10-17 22:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_borrowrecord_history_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBorrowRecord',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('borrowed_at', models.DateTimeField()),
+                ('due_date', models.DateTimeField()),
+                ('returned_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.book')),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Borrow Record',
+                'verbose_name_plural': 'Archived Borrow Records',
+                'ordering': ['borrowed_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedborrowrecord',
+            index=models.Index(fields=['borrowed_at', 'id'], name='archived_borrow_history_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2 on 2026-10-17 22:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_archivedborrowrecord'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.book')),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Book Hold',
+                'verbose_name_plural': 'Book Holds',
+                'ordering': ['created_at', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='bookhold',
+            index=models.Index(fields=['book', 'created_at', 'id'], name='book_hold_queue_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='bookhold',
+            constraint=models.UniqueConstraint(fields=('book', 'member'), name='unique_hold_per_member'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2 on 2026-10-17 22:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_bookhold'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCirculation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('borrowed_count', models.PositiveIntegerField(default=0)),
+                ('returned_count', models.PositiveIntegerField(default=0)),
+                ('loan_seconds', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Daily Circulation',
+                'verbose_name_plural': 'Daily Circulation',
+                'ordering': ['day', 'book'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedborrowrecord',
+            index=models.Index(fields=['returned_at'], name='archived_returned_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrowrecord',
+            index=models.Index(fields=['returned_at'], name='borrow_returned_at_idx'),
+        ),
+        migrations.AddField(
+            model_name='dailycirculation',
+            name='book',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.book'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailycirculation',
+            constraint=models.UniqueConstraint(fields=('day', 'book'), name='unique_daily_circulation_per_book'),
+        ),
+    ]
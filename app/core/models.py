@@ -3,6 +3,9 @@ from datetime import timedelta
 
 from decouple import config
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils import timezone
@@ -10,6 +13,16 @@ from django.utils import timezone
 from app import settings
 
 
+def validate_password_strength(raw_password):
+    """
+    Raise ValidationError unless the password is long enough and contains an uppercase letter.
+    """
+    if len(raw_password) < int(config('PASSWORD_LENGTH')):
+        raise ValidationError("Password must be at least 8 characters long.")
+    if not re.search(r'[A-Z]', raw_password):
+        raise ValidationError("Password must contain at least one uppercase letter.")
+
+
 class UserManager(BaseUserManager):
     """
     Custom manager for the User model.
@@ -78,10 +91,7 @@ class User(AbstractUser):
         """
         Set the password for the user after validating its strength.
         """
-        if len(raw_password) < int(config('PASSWORD_LENGTH')):
-            raise ValidationError("Password must be at least 8 characters long.")
-        if not re.search(r'[A-Z]', raw_password):
-            raise ValidationError("Password must contain at least one uppercase letter.")
+        validate_password_strength(raw_password)
 
         super().set_password(raw_password)
 
@@ -94,12 +104,19 @@ class Book(models.Model):
     author = models.CharField(max_length=255)
     total_copies = models.PositiveIntegerField()
     available_copies = models.PositiveIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'Book'
         verbose_name_plural = 'Books'
         ordering = ['title']
         unique_together = ('title', 'author')
+        indexes = [
+            models.Index(fields=['title', 'id'], name='book_title_id_idx'),
+            GinIndex(SearchVector('title', 'author', config='simple'), name='book_search_vector_idx'),
+            GinIndex(fields=['title'], opclasses=['gin_trgm_ops'], name='book_title_trgm_idx'),
+            GinIndex(fields=['author'], opclasses=['gin_trgm_ops'], name='book_author_trgm_idx'),
+        ]
 
     def __str__(self):
         return f'{self.title} by {self.author}'
@@ -109,16 +126,35 @@ class BorrowRecord(models.Model):
     """
     Model representing a record of a book borrowed by a user.
     """
+    LOAN_PERIOD = timedelta(days=30)
+
     book = models.ForeignKey(Book, on_delete=models.CASCADE)
     member = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     borrowed_at = models.DateTimeField(auto_now_add=True)
     due_date = models.DateTimeField()
     returned_at = models.DateTimeField(null=True, blank=True)
+    last_overdue_notified_at = models.DateTimeField(null=True, blank=True)
+    overdue_notice_count = models.PositiveSmallIntegerField(default=0)
 
     class Meta:
         verbose_name = 'Borrow Record'
         verbose_name_plural = 'Borrow Records'
         ordering = ['borrowed_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['book', 'member'],
+                condition=models.Q(returned_at__isnull=True),
+                name='unique_open_borrow_per_member',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['borrowed_at', 'id'], name='borrow_history_idx'),
+            models.Index(fields=['member', 'borrowed_at'], condition=models.Q(returned_at__isnull=True),
+                         name='borrow_open_member_idx'),
+            models.Index(fields=['due_date'], condition=models.Q(returned_at__isnull=True),
+                         name='borrow_open_due_date_idx'),
+            models.Index(fields=['returned_at'], name='borrow_returned_at_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         """
@@ -127,8 +163,143 @@ class BorrowRecord(models.Model):
         if not self.pk and self.due_date is None:
             if self.borrowed_at is None:
                 self.borrowed_at = timezone.now()
-            self.due_date = self.borrowed_at + timedelta(days=30)
+            self.due_date = self.borrowed_at + self.LOAN_PERIOD
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f'{self.book.title} borrowed by {self.member} on {self.borrowed_at}'
+
+
+class BookHold(models.Model):
+    """
+    Model representing a member waiting for a copy of a book; holds are served first come, first served.
+    """
+    book = models.ForeignKey(Book, on_delete=models.CASCADE)
+    member = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Book Hold'
+        verbose_name_plural = 'Book Holds'
+        ordering = ['created_at', 'id']
+        constraints = [
+            models.UniqueConstraint(fields=['book', 'member'], name='unique_hold_per_member'),
+        ]
+        indexes = [
+            models.Index(fields=['book', 'created_at', 'id'], name='book_hold_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.book.title} held by {self.member} since {self.created_at}'
+
+
+class ArchivedBorrowRecord(models.Model):
+    """
+    Model representing a returned borrow record moved out of BorrowRecord by the archival job.
+    The original BorrowRecord id is kept, so ids stay unique across both tables.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    book = models.ForeignKey(Book, on_delete=models.CASCADE)
+    member = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    borrowed_at = models.DateTimeField()
+    due_date = models.DateTimeField()
+    returned_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Archived Borrow Record'
+        verbose_name_plural = 'Archived Borrow Records'
+        ordering = ['borrowed_at']
+        indexes = [
+            models.Index(fields=['borrowed_at', 'id'], name='archived_borrow_history_idx'),
+            models.Index(fields=['returned_at'], name='archived_returned_at_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.book.title} borrowed by {self.member} on {self.borrowed_at}'
+
+
+class DailyCirculation(models.Model):
+    """
+    Model representing one day of loan activity for a book, rolled up from borrow records by a nightly task.
+    ``loan_seconds`` is the total duration of the loans returned that day.
+    """
+    day = models.DateField()
+    book = models.ForeignKey(Book, on_delete=models.CASCADE)
+    borrowed_count = models.PositiveIntegerField(default=0)
+    returned_count = models.PositiveIntegerField(default=0)
+    loan_seconds = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Daily Circulation'
+        verbose_name_plural = 'Daily Circulation'
+        ordering = ['day', 'book']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'book'], name='unique_daily_circulation_per_book'),
+        ]
+
+    def __str__(self):
+        return f'{self.book.title} on {self.day}: {self.borrowed_count} borrowed, {self.returned_count} returned'
+
+
+class OutboxMessage(models.Model):
+    """
+    Model representing a notification email written in the transaction of the change it reports and sent later by
+    the outbox dispatcher task.
+    """
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    from_email = models.CharField(max_length=255)
+    recipient_list = ArrayField(models.EmailField(max_length=255))
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Outbox Message'
+        verbose_name_plural = 'Outbox Messages'
+        ordering = ['id']
+
+    def __str__(self):
+        return f'{self.subject} to {", ".join(self.recipient_list)}'
+
+
+class NotificationEvent(models.Model):
+    """
+    Model representing a borrow or return event waiting to be included in the next staff digest email.
+    """
+    BORROWED = 0
+    RETURNED = 1
+    KIND_CHOICES = ((BORROWED, 'BORROWED'), (RETURNED, 'RETURNED'),)
+    kind = models.SmallIntegerField(choices=KIND_CHOICES)
+    book_title = models.CharField(max_length=255)
+    member_name = models.CharField(max_length=255)
+    member_email = models.EmailField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Notification Event'
+        verbose_name_plural = 'Notification Events'
+        ordering = ['id']
+
+    def __str__(self):
+        return f'{self.get_kind_display()} {self.book_title} by {self.member_email} at {self.created_at}'
+
+
+class RefreshToken(models.Model):
+    """
+    Model representing a refresh token, stored as a SHA-256 hash. Every refresh replaces the token with a new one
+    of the same family; presenting a replaced token again revokes the whole family.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='refresh_tokens')
+    token_hash = models.CharField(max_length=64, unique=True)
+    family = models.UUIDField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    replaced_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Refresh Token'
+        verbose_name_plural = 'Refresh Tokens'
+
+    def __str__(self):
+        return f'Refresh token of {self.user.email} expiring at {self.expires_at}'
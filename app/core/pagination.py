@@ -0,0 +1,143 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination:
+    """
+    Keyset (cursor) pagination over a fixed, unique ordering.
+
+    The position of the last row of a page is encoded into an opaque cursor, and the next page is selected with a
+    ``WHERE (a, b) > (x, y)`` style filter instead of an OFFSET, so every page costs the same regardless of depth.
+    The last ordering field must be unique (usually ``id``) so that ties are broken deterministically.
+    """
+    ordering = ('id',)
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def __init__(self, ordering=None, page_size=None, max_page_size=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        if page_size is not None:
+            self.page_size = page_size
+        if max_page_size is not None:
+            self.max_page_size = max_page_size
+
+    def paginate_queryset(self, queryset, request):
+        """
+        Return a single page of rows from the queryset, positioned after the cursor given in the request.
+        """
+        return self.paginate_querysets([queryset], request)
+
+    def paginate_querysets(self, querysets, request):
+        """
+        Return a single page merged from several querysets that share the ordering fields, e.g. a table and its
+        archive. Each queryset is read with the same keyset filter and limit, so a page costs one query per queryset.
+        The unique last ordering field must also be unique across the querysets.
+        """
+        self.request = request
+        self.limit = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        rows = []
+        for queryset in querysets:
+            queryset = queryset.order_by(*self.ordering)
+            if position is not None:
+                try:
+                    queryset = queryset.filter(self.get_keyset_filter(position))
+                except (TypeError, ValueError, DjangoValidationError):
+                    raise ValidationError({self.cursor_query_param: 'Invalid cursor.'})
+            rows.extend(queryset[:self.limit + 1])
+
+        if len(querysets) > 1:
+            # Stable sorts from the last ordering field to the first give the combined lexicographic order.
+            for index in reversed(range(len(self.ordering))):
+                rows.sort(key=lambda row: self.get_position(row)[index], reverse=self.ordering[index].startswith('-'))
+
+        self.has_next = len(rows) > self.limit
+        rows = rows[:self.limit]
+        self.next_position = self.get_position(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_page_size(self, request):
+        """
+        Read the requested page size, clamped to ``max_page_size``.
+        """
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw is None:
+            return self.page_size
+        try:
+            size = int(raw)
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: 'A valid integer is required.'})
+        if size < 1:
+            raise ValidationError({self.page_size_query_param: 'Ensure this value is greater than or equal to 1.'})
+        return min(size, self.max_page_size)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_position(self, row):
+        """
+        Extract the values of the ordering fields from a model instance or a ``.values()`` dict.
+        """
+        fields = [field.lstrip('-') for field in self.ordering]
+        if isinstance(row, dict):
+            return [row[field] for field in fields]
+        return [getattr(row, field) for field in fields]
+
+    def get_keyset_filter(self, position):
+        """
+        Build the lexicographic "strictly after this position" filter for the ordering.
+
+        The redundant bound on the leading field lets PostgreSQL turn the expanded OR into an index range scan.
+        """
+        condition = None
+        for index in reversed(range(len(self.ordering))):
+            name, lookup = self.get_lookup(self.ordering[index])
+            after = Q(**{name + lookup: position[index]})
+            condition = after if condition is None else after | (Q(**{name: position[index]}) & condition)
+
+        name, lookup = self.get_lookup(self.ordering[0])
+        return Q(**{name + lookup + 'e': position[0]}) & condition
+
+    @staticmethod
+    def get_lookup(field):
+        if field.startswith('-'):
+            return field[1:], '__lt'
+        return field, '__gt'
+
+    def encode_cursor(self, position):
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in position]
+        payload = json.dumps(values, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(payload).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+        except (binascii.Error, UnicodeError, ValueError):
+            raise ValidationError({self.cursor_query_param: 'Invalid cursor.'})
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise ValidationError({self.cursor_query_param: 'Invalid cursor.'})
+        return position
@@ -0,0 +1,129 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from borrow.tasks import overdue_records
+from core.models import Book, BorrowRecord, User
+
+
+class QueryPlanTests(TestCase):
+    """
+    Seed a realistically sized borrow history and check with EXPLAIN that the hot BorrowRecord lookups use indexes.
+    """
+    members_count = 2000
+    books_count = 500
+    history_per_member = 20
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.staff = User.objects.create(name='staff', email='staff@test.com', user_type=User.LIBRARY_USER,
+                                        is_active=True)
+        members = User.objects.bulk_create(
+            User(name=f'visitor{i}', email=f'visitor{i}@test.com', user_type=User.VISITOR_USER, is_active=True)
+            for i in range(cls.members_count)
+        )
+        books = Book.objects.bulk_create(
+            Book(title=f'Book {i}', author=f'Author {i % 50}', total_copies=100, available_copies=90)
+            for i in range(cls.books_count)
+        )
+
+        records = []
+        for index, member in enumerate(members):
+            for offset in range(cls.history_per_member):
+                book = books[(index + offset) % cls.books_count]
+                borrowed_at = now - timedelta(days=offset * 30 + 31)
+                records.append(BorrowRecord(book=book, member=member, due_date=borrowed_at + BorrowRecord.LOAN_PERIOD,
+                                            returned_at=borrowed_at + timedelta(days=10)))
+            # One open loan per member; only every hundredth one is overdue.
+            due_date = now - timedelta(days=3) if index % 100 == 0 else now + timedelta(days=index % 30 + 1)
+            records.append(BorrowRecord(book=books[(index + cls.history_per_member) % cls.books_count],
+                                        member=member, due_date=due_date))
+        BorrowRecord.objects.bulk_create(records, batch_size=5000)
+        # borrowed_at is auto_now_add, so spread the loans over time afterwards.
+        BorrowRecord.objects.filter(returned_at__isnull=False).update(
+            borrowed_at=F('due_date') - BorrowRecord.LOAN_PERIOD)
+
+        cls.member = members[1]
+        cls.open_record = BorrowRecord.objects.get(member=cls.member, returned_at__isnull=True)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_user, core_book, core_borrowrecord')
+
+    def setUp(self):
+        self.client = APIClient()
+        patcher = patch('borrow.tasks.send_notification_email.delay')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN {sql}')
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+    def borrow_record_queries(self, captured):
+        return [query['sql'] for query in captured
+                if query['sql'].startswith('SELECT') and '"core_borrowrecord"' in query['sql']]
+
+    def assertPlanUsesIndex(self, plan, *index_names):
+        """Assert the plan never scans the whole borrow table and reads it through one of ``index_names``."""
+        self.assertNotIn('Seq Scan on core_borrowrecord', plan, msg=plan)
+        self.assertTrue(any(name in plan for name in index_names), msg=plan)
+
+    def assertRequestUsesIndex(self, index_names, method, url, user, data=None):
+        """Run a request, then EXPLAIN every BorrowRecord SELECT it issued."""
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as captured:
+            getattr(self.client, method)(url, data, format='json')
+        queries = self.borrow_record_queries(captured)
+        self.assertTrue(queries)
+        for sql in queries:
+            self.assertPlanUsesIndex(self.explain(sql), *index_names)
+
+    OPEN_BY_MEMBER = ('borrow_open_member_idx',)
+    OPEN_BY_BOOK_AND_MEMBER = ('unique_open_borrow_per_member', 'borrow_open_member_idx')
+
+    def test_my_borrowed_books(self):
+        """Ensure a visitor's open loans are read from the open-loans-by-member index."""
+        self.assertRequestUsesIndex(self.OPEN_BY_MEMBER, 'get', reverse('borrow:my-borrowed-books'), self.member)
+
+    def test_user_borrowed_books(self):
+        """Ensure staff listing a visitor's open loans use the open-loans-by-member index."""
+        url = reverse('borrow:user-borrowed-books', kwargs={'user_id': self.member.id})
+        self.assertRequestUsesIndex(self.OPEN_BY_MEMBER, 'get', url, self.staff)
+
+    def test_delete_visitor_open_loans_check(self):
+        """Ensure the open-loans check before deleting a visitor uses the open-loans-by-member index."""
+        url = reverse('user:delete_visitor_user', kwargs={'user_id': self.member.id})
+        self.assertRequestUsesIndex(self.OPEN_BY_MEMBER, 'delete', url, self.staff)
+
+    def test_return_book(self):
+        """Ensure finding the loan to return goes through an open-loans index."""
+        url = reverse('borrow:return-book', kwargs={'pk': self.open_record.book_id})
+        self.assertRequestUsesIndex(self.OPEN_BY_BOOK_AND_MEMBER, 'post', url, self.member)
+
+    def test_batch_return(self):
+        """Ensure finding the loans of a batch return goes through an open-loans index."""
+        self.assertRequestUsesIndex(self.OPEN_BY_BOOK_AND_MEMBER, 'post', reverse('borrow:return-batch'),
+                                    self.member, {'book_ids': [self.open_record.book_id]})
+
+    def test_visitor_history(self):
+        """Ensure a visitor's history page only reads that member's loans through the member index."""
+        self.assertRequestUsesIndex(('core_borrowrecord_member_id',), 'get', reverse('borrow:borrow-history'),
+                                    self.member)
+
+    def test_staff_history(self):
+        """Ensure a staff history page deep into the table is read in order from the history index."""
+        self.client.force_authenticate(self.staff)
+        url = self.client.get(reverse('borrow:borrow-history'), {'page_size': 200}).data['next']
+        self.assertRequestUsesIndex(('borrow_history_idx',), 'get', url, self.staff)
+
+    def test_overdue_records(self):
+        """Ensure the overdue job only range-scans the open loans by due date."""
+        self.assertPlanUsesIndex(overdue_records(timezone.now()).explain(), 'borrow_open_due_date_idx')
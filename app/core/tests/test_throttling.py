@@ -0,0 +1,118 @@
+from unittest.mock import patch
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Book, User
+from core.throttling import MemoryTokenBuckets, RedisTokenBuckets, get_buckets
+
+
+def throttle_rates(**rates):
+    """Override some of the configured throttle rates."""
+    return override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], **rates},
+    })
+
+
+class TokenBucketTests(TestCase):
+    """Tests for the in-memory token buckets."""
+
+    @patch('core.throttling.time.time')
+    def test_burst_and_refill(self, now):
+        """Ensure a bucket allows a burst of its capacity, then refills at its rate."""
+        buckets = MemoryTokenBuckets()
+        now.return_value = 1000.0
+        self.assertEqual([buckets.consume('key', 3, 0.5)[0] for _ in range(4)], [True, True, True, False])
+        self.assertEqual(buckets.consume('key', 3, 0.5), (False, 2.0))
+        self.assertTrue(buckets.consume('other', 3, 0.5)[0])
+
+        now.return_value = 1002.0
+        self.assertEqual(buckets.consume('key', 3, 0.5), (True, 0))
+        self.assertFalse(buckets.consume('key', 3, 0.5)[0])
+
+    def test_redis_unavailable_fails_open(self):
+        """Ensure requests are allowed, not failed, while Redis cannot be reached."""
+        import redis
+
+        buckets = RedisTokenBuckets('redis://localhost:1/0')
+        with patch.object(buckets, 'script', side_effect=redis.ConnectionError):
+            with self.assertLogs('core.throttling', 'WARNING'):
+                self.assertEqual(buckets.consume('key', 3, 0.5), (True, 0))
+
+
+class ThrottlingApiTests(TestCase):
+    """Tests for the throttled login, registration and borrow endpoints."""
+
+    def setUp(self):
+        get_buckets().clear()
+        self.client = APIClient()
+        self.login_url = reverse('user:login')
+        self.register_url = reverse('user:register')
+
+    def login(self, email, **extra):
+        return self.client.post(self.login_url, {'email': email, 'password': 'Wrongpassword1'}, format='json', **extra)
+
+    def test_login_throttled_per_email(self):
+        """Ensure repeated logins for one email are refused with Retry-After, while other emails still log in."""
+        for _ in range(5):
+            self.assertEqual(self.login('victim@test.com').status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.login('VICTIM@test.com', REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '12')
+        self.assertEqual(self.login('other@test.com').status_code, status.HTTP_403_FORBIDDEN)
+
+    @throttle_rates(login_ip='2/min')
+    def test_login_throttled_per_ip(self):
+        """Ensure one address cannot cycle through emails, while other addresses are unaffected."""
+        self.login('first@test.com')
+        self.login('second@test.com')
+
+        self.assertEqual(self.login('third@test.com').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.login('third@test.com', REMOTE_ADDR='10.0.0.2').status_code,
+                         status.HTTP_403_FORBIDDEN)
+
+    @throttle_rates(login_ip='2/min')
+    def test_spoofed_forwarded_for_ignored(self):
+        """Ensure a client cannot get a fresh per-IP bucket by sending its own X-Forwarded-For header."""
+        for i in range(2):
+            self.login(f'user{i}@test.com', HTTP_X_FORWARDED_FOR=f'192.0.2.{i}')
+
+        response = self.login('user2@test.com', HTTP_X_FORWARDED_FOR='192.0.2.2')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @patch('user.tasks.send_activation_email.delay')
+    def test_register_throttled_per_email(self, mock_send_activation_email):
+        """Ensure registrations for one email are throttled before touching the database."""
+        data = {'name': 'visitor', 'email': 'visitor@test.com', 'password': 'Testpassword123', 'user_type': 1}
+        responses = [self.client.post(self.register_url, data, format='json') for _ in range(4)]
+
+        self.assertEqual([response.status_code for response in responses],
+                         [status.HTTP_201_CREATED] + [status.HTTP_400_BAD_REQUEST] * 2
+                         + [status.HTTP_429_TOO_MANY_REQUESTS])
+
+    @throttle_rates(borrow_user='1/min')
+    def test_borrow_throttled_per_user(self):
+        """Ensure single and batch borrows share one bucket per user."""
+        books = [Book.objects.create(title=f'Book {i}', author='Author', total_copies=1, available_copies=1)
+                 for i in range(3)]
+        visitor, other = [
+            User.objects.create(name=f'visitor{i}', email=f'visitor{i}@test.com', user_type=User.VISITOR_USER,
+                                is_active=True)
+            for i in range(2)
+        ]
+
+        self.client.force_authenticate(visitor)
+        response = self.client.post(reverse('borrow:borrow-book', kwargs={'pk': books[0].id}), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post(reverse('borrow:borrow-batch'), {'book_ids': [books[1].id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '60')
+
+        self.client.force_authenticate(other)
+        response = self.client.post(reverse('borrow:borrow-book', kwargs={'pk': books[2].id}), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
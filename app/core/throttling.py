@@ -0,0 +1,175 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+logger = logging.getLogger(__name__)
+
+# Refills the bucket for the time elapsed since its last request, then takes one token if there is one.
+# Returns whether the request is allowed and, if not, the seconds until a token is available.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(wait)}
+"""
+
+
+class MemoryTokenBuckets:
+    """
+    Token buckets held in process memory, for tests and setups without Redis.
+    """
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, rate):
+        """
+        Take a token from bucket ``key``, holding at most ``capacity`` tokens and refilled with ``rate`` tokens per
+        second. Return whether one was available and, if not, the seconds to wait for the next.
+        """
+        now = time.time()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0, now - updated_at) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return True, 0
+            self._buckets[key] = (tokens, now)
+            return False, (1 - tokens) / rate
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class RedisTokenBuckets:
+    """
+    Token buckets stored in Redis and updated by one Lua script, so concurrent workers never overdraw a bucket.
+
+    While Redis is unreachable requests are let through rather than failed.
+    """
+
+    def __init__(self, url=None):
+        import redis
+
+        self._redis = redis
+        self.client = redis.Redis.from_url(url or settings.REDIS_URL)
+        self.script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def consume(self, key, capacity, rate):
+        try:
+            allowed, wait = self.script(keys=[key], args=[capacity, rate, time.time()])
+        except self._redis.RedisError:
+            logger.warning('Could not reach the throttle buckets; allowing the request.', exc_info=True)
+            return True, 0
+        return bool(allowed), float(wait)
+
+
+_buckets = None
+
+
+def get_buckets():
+    global _buckets
+    if _buckets is None:
+        _buckets = import_string(settings.THROTTLE_BACKEND)()
+    return _buckets
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Base class of the token bucket throttles.
+
+    A rate of ``num/period`` allows bursts of ``num`` requests and refills at ``num`` per period. The rate is looked
+    up in DEFAULT_THROTTLE_RATES under ``<view.throttle_scope>_<key_name>``; views without a configured rate are
+    not throttled.
+    """
+    key_name = None
+
+    def __init__(self):
+        # The rate depends on the view, so it is only read in allow_request().
+        self.wait_seconds = None
+
+    def get_rate(self):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_ident_key(self, request):
+        """
+        Return the identity the bucket is kept for, or None to leave the request unthrottled.
+        """
+        raise NotImplementedError('.get_ident_key() must be overridden')
+
+    def allow_request(self, request, view):
+        self.scope = f'{getattr(view, "throttle_scope", None)}_{self.key_name}'
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+
+        ident = self.get_ident_key(request)
+        if ident is None:
+            return True
+
+        num_requests, duration = self.parse_rate(self.rate)
+        allowed, self.wait_seconds = get_buckets().consume(f'throttle:{self.scope}:{ident}', num_requests,
+                                                           num_requests / duration)
+        return allowed
+
+    def wait(self):
+        return math.ceil(self.wait_seconds) if self.wait_seconds else None
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Throttles authenticated requests per user.
+    """
+    key_name = 'user'
+
+    def get_ident_key(self, request):
+        return request.user.pk if request.user and request.user.is_authenticated else None
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Throttles requests per client IP address.
+
+    X-Forwarded-For is only trusted as far as REST_FRAMEWORK['NUM_PROXIES'] allows, so clients cannot pick their
+    own bucket by sending the header.
+    """
+    key_name = 'ip'
+
+    def get_ident_key(self, request):
+        return self.get_ident(request)
+
+
+class EmailTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Throttles requests per 'email' in the request data, whichever address they come from.
+    """
+    key_name = 'email'
+
+    def get_ident_key(self, request):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not isinstance(email, str) or not email:
+            return None
+        return hashlib.sha256(email.strip().lower().encode()).hexdigest()
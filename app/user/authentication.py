@@ -1,7 +1,9 @@
 import jwt
 from rest_framework import authentication, exceptions
 
-from core.models import User
+from .principal import get_principal
+from .revocation import get_revocation_list
+from .tokens import decode_access_token
 
 
 class JWTAuthentication(authentication.BaseAuthentication):
@@ -10,7 +12,8 @@ class JWTAuthentication(authentication.BaseAuthentication):
     """
     def authenticate(self, request):
         """
-        Authenticates a user based on JWT token in the Authorization header.
+        Authenticates a user based on JWT token in the Authorization header. The decoded payload is returned
+        as ``request.auth``.
         """
         auth_header = request.headers.get('Authorization')
 
@@ -20,15 +23,18 @@ class JWTAuthentication(authentication.BaseAuthentication):
         token = auth_header.split(' ')[1]
 
         try:
-            payload = jwt.decode(token, 'secret', algorithms=['HS256'])
+            payload = decode_access_token(token)
         except jwt.ExpiredSignatureError:
             raise exceptions.AuthenticationFailed('Token has expired')
         except jwt.InvalidTokenError:
             raise exceptions.AuthenticationFailed('Invalid token')
 
-        user = User.objects.filter(id=payload['id']).first()
+        if get_revocation_list().is_revoked(payload):
+            raise exceptions.AuthenticationFailed('Token has been revoked')
+
+        user = get_principal(payload['id'], payload.get('iat'))
 
         if user is None:
             raise exceptions.AuthenticationFailed('User not found')
 
-        return (user, None)
+        return (user, payload)
@@ -0,0 +1,156 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from books.importer import iter_chunks
+from core.models import User, validate_password_strength
+
+from .tasks import send_activation_emails
+
+REGISTRATION_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+# Hashing is deliberately slow, so a request only registers as many visitors as it can hash in a few seconds on
+# one CPU; larger uploads go through the register_visitors command, which hashes in a process pool.
+MAX_BULK_REGISTRATIONS = 25
+
+DUPLICATE_EMAIL_ERROR = 'A user with this email already exists.'
+
+
+class BulkVisitorSerializer(serializers.ModelSerializer):
+    """
+    Validates one visitor of a bulk registration. Email uniqueness is checked once per chunk instead of per row.
+    """
+    class Meta:
+        model = User
+        fields = ['name', 'email', 'password']
+        extra_kwargs = {'email': {'validators': []}}
+
+    def validate_email(self, value):
+        return User.objects.normalize_email(value)
+
+    def validate_password(self, value):
+        try:
+            validate_password_strength(value)
+        except ValidationError as exc:
+            raise serializers.ValidationError(exc.messages)
+        return value
+
+
+def register_visitors(rows, chunk_size=REGISTRATION_CHUNK_SIZE, hash_workers=None):
+    """
+    Validate and create inactive visitors from an iterable of row dicts with name, email and password,
+    one chunk at a time.
+
+    Passwords of a chunk are hashed in parallel by ``hash_workers`` processes (``BULK_REGISTRATION_HASH_WORKERS`` by
+    default, 1 hashes in the calling process) and the chunk is inserted with one ``bulk_create``. Once committed,
+    a single task emails every created visitor their activation link.
+
+    Returns a report with processed/created counts and per-row validation errors (1-based row numbers).
+    Raises UnreadableUploadError, once the rows before it are registered, if the rows cannot be read to the end.
+    """
+    child = BulkVisitorSerializer()
+    report = {'processed': 0, 'created': 0, 'errors': [], 'errors_truncated': False}
+    activations = []
+    seen_emails = set()
+    row_number = 0
+
+    workers = hash_workers or settings.BULK_REGISTRATION_HASH_WORKERS or os.cpu_count() or 1
+    try:
+        with password_hasher(workers) as hash_passwords:
+            for chunk in iter_chunks(rows, chunk_size):
+                valid = {}
+                for row in chunk:
+                    row_number += 1
+                    try:
+                        if not isinstance(row, dict):
+                            raise serializers.ValidationError({'non_field_errors': ['Expected an object.']})
+                        data = child.run_validation(row)
+                    except serializers.ValidationError as exc:
+                        _report_error(report, row_number, exc.detail)
+                        continue
+                    if data['email'] in seen_emails:
+                        _report_error(report, row_number, {'email': ['Duplicate email in upload.']})
+                        continue
+                    seen_emails.add(data['email'])
+                    valid[row_number] = data
+
+                users = _create_chunk(valid, hash_passwords, report)
+                activations.extend((user.email, user.name, user.id) for user in users)
+                report['processed'] += len(chunk)
+                report['created'] += len(users)
+    finally:
+        # Visitors of the chunks already inserted get their email even if a later row cannot be read.
+        if activations:
+            transaction.on_commit(lambda: send_activation_emails.delay(activations))
+    return report
+
+
+@contextmanager
+def password_hasher(workers):
+    """
+    Yield a function hashing a list of passwords, in a pool of ``workers`` processes when there is more than one.
+    """
+    if workers <= 1:
+        yield lambda passwords: [make_password(password) for password in passwords]
+        return
+
+    # Workers started with spawn or forkserver must set Django up before they can hash.
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        yield lambda passwords: list(pool.map(make_password, passwords,
+                                              chunksize=max(1, len(passwords) // (4 * workers))))
+
+
+def _report_error(report, row_number, detail):
+    if len(report['errors']) >= MAX_REPORTED_ERRORS:
+        report['errors_truncated'] = True
+        return
+    report['errors'].append({'row': row_number, 'errors': detail})
+
+
+def _drop_existing(valid, report):
+    """
+    Report and remove the rows whose email is already taken. Returns whether any row was removed.
+    """
+    existing = set(User.objects.filter(email__in=[data['email'] for data in valid.values()])
+                   .values_list('email', flat=True))
+    for row_number, data in list(valid.items()):
+        if data['email'] in existing:
+            _report_error(report, row_number, {'email': [DUPLICATE_EMAIL_ERROR]})
+            del valid[row_number]
+    return bool(existing)
+
+
+def _create_chunk(valid, hash_passwords, report):
+    """
+    Hash the passwords of one chunk of validated rows and insert the visitors with one query.
+
+    Emails taken since the chunk was checked, by a concurrent registration, are reported and the insert retried.
+    """
+    _drop_existing(valid, report)
+    if not valid:
+        return []
+
+    passwords = hash_passwords([data['password'] for data in valid.values()])
+    users = {
+        row_number: User(name=data['name'], email=data['email'], password=password, user_type=User.VISITOR_USER,
+                         is_active=False)
+        for (row_number, data), password in zip(valid.items(), passwords)
+    }
+
+    while True:
+        try:
+            with transaction.atomic():
+                return User.objects.bulk_create(list(users.values()))
+        except IntegrityError:
+            if not _drop_existing(valid, report):
+                raise
+            users = {row_number: user for row_number, user in users.items() if row_number in valid}
+            if not users:
+                return []
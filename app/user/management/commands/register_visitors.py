@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from books.importer import UnreadableUploadError, iter_csv_rows
+from user import bulk
+
+
+class Command(BaseCommand):
+    help = ('Register visitors from a CSV file with a name,email,password header row and email each of them their '
+            'activation link.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file to read.')
+        parser.add_argument('--chunk-size', type=int, default=bulk.REGISTRATION_CHUNK_SIZE,
+                            help='Rows validated, hashed and inserted together.')
+
+    def handle(self, *args, **options):
+        try:
+            stream = open(options['path'], 'rb')
+        except OSError as e:
+            raise CommandError(f'Cannot read {options["path"]}: {e}')
+
+        with stream:
+            try:
+                report = bulk.register_visitors(iter_csv_rows(stream), options['chunk_size'])
+            except UnreadableUploadError as e:
+                raise CommandError(f'Cannot read {options["path"]}: {e} The rows before it were registered.')
+
+        for error in report['errors']:
+            messages = '; '.join(f'{field}: {" ".join(map(str, details))}'
+                                 for field, details in error['errors'].items())
+            self.stderr.write(f'Row {error["row"]}: {messages}')
+        if report['errors_truncated']:
+            self.stderr.write('More errors were not reported.')
+        self.stdout.write(self.style.SUCCESS(f'Registered {report["created"]} of {report["processed"]} visitors.'))
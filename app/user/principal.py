@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from core.models import User
+
+PRINCIPAL_FIELDS = ('id', 'name', 'email', 'user_type', 'is_active')
+# Model.from_db() expects the loaded values in the order of the model's concrete fields.
+_FIELD_NAMES = tuple(field.attname for field in User._meta.concrete_fields if field.attname in PRINCIPAL_FIELDS)
+
+
+class LocalPrincipalCache:
+    """
+    Small per-process LRU of principal values whose entries expire after a few seconds.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, values = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return values
+
+    def set(self, key, values):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, values)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard_user(self, user_id):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = LocalPrincipalCache(settings.PRINCIPAL_LOCAL_CACHE_SIZE, settings.PRINCIPAL_LOCAL_CACHE_TTL)
+
+
+def principal_cache_key(user_id):
+    return f'user:principal:{user_id}'
+
+
+def get_principal(user_id, issued_at):
+    """
+    Return the user a token was issued to, built from cached fields, or None if the user no longer exists.
+
+    The process-local tier is keyed by user id and token ``iat``, so a freshly issued token always reads the
+    shared cache; the shared tier is keyed by user id so that a user change can drop it in one delete.
+    Fields outside PRINCIPAL_FIELDS are deferred and loaded from the database on first access.
+    """
+    local_key = (user_id, issued_at)
+    values = local_cache.get(local_key)
+    if values is None:
+        values = cache.get(principal_cache_key(user_id))
+        if values is None:
+            values = User.objects.filter(id=user_id).values_list(*_FIELD_NAMES).first()
+            if values is None:
+                return None
+            cache.set(principal_cache_key(user_id), values, settings.PRINCIPAL_CACHE_TIMEOUT)
+        local_cache.set(local_key, values)
+    return User.from_db(DEFAULT_DB_ALIAS, _FIELD_NAMES, values)
+
+
+def invalidate_principal(user_id):
+    """
+    Drop the cached principal now, and again once the surrounding transaction commits so that a request that
+    read the old row in the meantime cannot leave it cached. Other processes' local entries expire on their own.
+    """
+    local_cache.discard_user(user_id)
+    cache.delete(principal_cache_key(user_id))
+    transaction.on_commit(lambda: cache.delete(principal_cache_key(user_id)))
@@ -0,0 +1,195 @@
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'user:revocations'
+TOKEN_KEY_PREFIX = 'user:revoked-token:'
+USER_KEY_PREFIX = 'user:revoked-user:'
+# Seconds between sweeps of the expired revocations held in memory.
+PRUNE_INTERVAL = 60
+
+
+class MemoryRevocationList:
+    """
+    Revoked token ids and per-user revocation times held in process memory, each until no token it could
+    match is still valid.
+
+    Used on its own in tests and setups without Redis, and as the local mirror of RedisRevocationList.
+    Expired entries are swept at most every PRUNE_INTERVAL seconds, whenever the list is read or written.
+    """
+
+    def __init__(self):
+        self._tokens = {}
+        self._users = {}
+        self._lock = threading.Lock()
+        self._pruned_at = time.time()
+
+    def is_revoked(self, payload):
+        """
+        Return True if the token's ``jti`` was revoked, or it was issued no later than its user's revocation.
+        """
+        now = time.time()
+        jti, user_id, issued_at = payload.get('jti'), payload.get('id'), payload.get('iat', 0)
+        with self._lock:
+            self._prune(now)
+            expires_at = self._tokens.get(jti)
+            if expires_at is not None:
+                if expires_at > now:
+                    return True
+                del self._tokens[jti]
+
+            revoked_at = self._users.get(user_id)
+            if revoked_at is not None:
+                if revoked_at + access_token_lifetime() > now:
+                    return issued_at <= revoked_at
+                del self._users[user_id]
+        return False
+
+    def revoke_token(self, jti, expires_at):
+        self._add_token(jti, expires_at)
+
+    def revoke_user(self, user_id, revoked_at=None):
+        self._add_user(user_id, time.time() if revoked_at is None else revoked_at)
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+            self._users.clear()
+
+    def _add_token(self, jti, expires_at):
+        with self._lock:
+            self._prune(time.time())
+            self._tokens[jti] = expires_at
+
+    def _add_user(self, user_id, revoked_at):
+        with self._lock:
+            self._prune(time.time())
+            self._users[user_id] = max(revoked_at, self._users.get(user_id, 0))
+
+    def _prune(self, now):
+        """
+        Drop the entries no valid token can match any more. Must be called with the lock held.
+        """
+        if now - self._pruned_at < PRUNE_INTERVAL:
+            return
+        self._pruned_at = now
+        self._tokens = {jti: expires_at for jti, expires_at in self._tokens.items() if expires_at > now}
+        oldest = now - access_token_lifetime()
+        self._users = {user_id: revoked_at for user_id, revoked_at in self._users.items() if revoked_at > oldest}
+
+
+class RedisRevocationList(MemoryRevocationList):
+    """
+    Revocations stored in Redis with a TTL equal to the remaining token lifetime, and mirrored in every process.
+
+    The local mirror is loaded from Redis once and then kept current through pub/sub, so checking a token
+    never leaves the process; writes go to Redis and are broadcast to the other processes.
+
+    The keys carry TTLs, so TOKEN_REVOCATION_REDIS_URL must point at a Redis that never evicts them
+    (``maxmemory-policy noeviction``), not at the LRU cache.
+    """
+
+    def __init__(self, url=None):
+        super().__init__()
+        import redis
+
+        self._redis = redis
+        self.client = redis.Redis.from_url(url or settings.TOKEN_REVOCATION_REDIS_URL)
+        self._listener = None
+        self._start_lock = threading.Lock()
+
+    def is_revoked(self, payload):
+        self._ensure_listening()
+        return super().is_revoked(payload)
+
+    def revoke_token(self, jti, expires_at):
+        ttl = int(expires_at - time.time()) + 1
+        if ttl > 0:
+            self.client.set(f'{TOKEN_KEY_PREFIX}{jti}', expires_at, ex=ttl)
+            self.client.publish(CHANNEL, json.dumps({'jti': jti, 'expires_at': expires_at}))
+        super().revoke_token(jti, expires_at)
+
+    def revoke_user(self, user_id, revoked_at=None):
+        revoked_at = time.time() if revoked_at is None else revoked_at
+        self.client.set(f'{USER_KEY_PREFIX}{user_id}', revoked_at, ex=access_token_lifetime() + 1)
+        self.client.publish(CHANNEL, json.dumps({'user': user_id, 'revoked_at': revoked_at}))
+        super().revoke_user(user_id, revoked_at)
+
+    def _ensure_listening(self):
+        if self._listener is not None and self._listener.is_alive():
+            return
+        with self._start_lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            try:
+                pubsub = self._subscribe()
+            except self._redis.RedisError:
+                logger.exception('Could not load the token revocation list; using the local copy.')
+                return
+            self._listener = threading.Thread(target=self._listen, args=(pubsub,), name='token-revocations',
+                                              daemon=True)
+            self._listener.start()
+
+    def _subscribe(self):
+        """
+        Subscribe before reading the stored revocations, so nothing published in between is missed.
+        """
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(CHANNEL)
+            for key in self.client.scan_iter(match='user:revoked-*'):
+                value = self.client.get(key)
+                if value is None:
+                    continue
+                key = key.decode()
+                if key.startswith(TOKEN_KEY_PREFIX):
+                    self._add_token(key[len(TOKEN_KEY_PREFIX):], float(value))
+                else:
+                    self._add_user(int(key[len(USER_KEY_PREFIX):]), float(value))
+        except self._redis.RedisError:
+            pubsub.close()
+            raise
+        return pubsub
+
+    def _listen(self, pubsub):
+        while True:
+            try:
+                for message in pubsub.listen():
+                    self._apply(json.loads(message['data']))
+            except self._redis.RedisError:
+                logger.warning('Lost the token revocation channel; reloading.', exc_info=True)
+            # The old subscription's connection is released before a new one is opened.
+            pubsub.close()
+            pubsub = None
+            while pubsub is None:
+                time.sleep(1)
+                try:
+                    pubsub = self._subscribe()
+                except self._redis.RedisError:
+                    logger.warning('Could not reload the token revocation list.', exc_info=True)
+
+    def _apply(self, message):
+        if 'jti' in message:
+            self._add_token(message['jti'], message['expires_at'])
+        else:
+            self._add_user(message['user'], message['revoked_at'])
+
+
+def access_token_lifetime():
+    return settings.JWT_ACCESS_TOKEN_MINUTES * 60
+
+
+_revocation_list = None
+
+
+def get_revocation_list():
+    global _revocation_list
+    if _revocation_list is None:
+        _revocation_list = import_string(settings.TOKEN_REVOCATION_BACKEND)()
+    return _revocation_list
@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import RefreshToken, User
+
+from .principal import invalidate_principal
+from .revocation import get_revocation_list
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_principal(sender, instance, **kwargs):
+    """
+    A changed or deleted user must not keep authenticating with the fields cached for it.
+    """
+    invalidate_principal(instance.id)
+
+
+@receiver(post_save, sender=User)
+def revoke_deactivated_user_tokens(sender, instance, created, **kwargs):
+    """
+    Tokens already issued to a deactivated user stop working as soon as the change is committed.
+    """
+    if not created and not instance.is_active:
+        RefreshToken.objects.filter(user=instance).delete()
+        revoke_user_tokens(instance.id)
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    revoke_user_tokens(instance.id)
+
+
+def revoke_user_tokens(user_id):
+    transaction.on_commit(lambda: get_revocation_list().revoke_user(user_id))
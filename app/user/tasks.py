@@ -1,7 +1,16 @@
+import logging
+
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django.utils import timezone
 
 from celery_folder.celery_app import app
+from core.models import RefreshToken
+
+ACTIVATION_EMAIL_MAX_ATTEMPTS = 3
+ACTIVATION_EMAIL_RETRY_DELAY = 300
+
+logger = logging.getLogger(__name__)
 
 
 @app.task
@@ -17,14 +26,67 @@ def send_activation_email(user_email, user_name, user_id):
         Returns:
             str: A message indicating whether the email was sent successfully or an error occurred.
     """
-    subject = 'Activate your account'
-    message = (f'Hello {user_name},\n\nPlease activate your account using the following link:'
-               f' http://localhost:8321/api/activate/{user_id}/')
-    from_email = settings.EMAIL_HOST_USER
-    recipient_list = [user_email]
+    subject, message, from_email, recipient_list = activation_message(user_email, user_name, user_id)
 
     try:
         send_mail(subject, message, from_email, recipient_list, fail_silently=False)
         return 'Email sent successfully'
     except Exception as e:
         return f'Error sending email: {e}'
+
+
+@app.task
+def send_activation_emails(users, attempt=1):
+    """
+        Sends the account activation emails of several users over a single SMTP connection, one message at a time.
+
+        Emails that fail are logged and sent again by a later task, up to ``ACTIVATION_EMAIL_MAX_ATTEMPTS`` times,
+        without resending the ones that went out.
+
+        Args:
+            users (list): ``(user_email, user_name, user_id)`` triples.
+            attempt (int): How many times these users have been tried, starting at 1.
+
+        Returns:
+            str: A message with the number of emails sent and failed.
+    """
+    failed = []
+    with get_connection() as connection:
+        for user in users:
+            subject, message, from_email, recipient_list = activation_message(*user)
+            try:
+                EmailMessage(subject, message, from_email, recipient_list, connection=connection).send()
+            except Exception:
+                logger.exception('Sending the activation email to %s failed.', user[0])
+                failed.append(user)
+
+    if not failed:
+        return f'{len(users)} emails sent successfully'
+
+    if attempt < ACTIVATION_EMAIL_MAX_ATTEMPTS:
+        send_activation_emails.apply_async((failed, attempt + 1), countdown=ACTIVATION_EMAIL_RETRY_DELAY * attempt)
+    else:
+        logger.error('Giving up on the activation emails of %s.', ', '.join(user[0] for user in failed))
+    return f'{len(users) - len(failed)} emails sent, {len(failed)} failed'
+
+
+def activation_message(user_email, user_name, user_id):
+    """
+    Build the ``(subject, message, from_email, recipient_list)`` tuple of an account activation email.
+    """
+    subject = 'Activate your account'
+    message = (f'Hello {user_name},\n\nPlease activate your account using the following link:'
+               f' http://localhost:8321/api/activate/{user_id}/')
+    return subject, message, settings.EMAIL_HOST_USER, [user_email]
+
+
+@app.task
+def prune_refresh_tokens():
+    """
+        Deletes expired refresh tokens. Replaced tokens are kept until they expire so that their reuse is detected.
+
+        Returns:
+            int: The number of deleted tokens.
+    """
+    deleted, _ = RefreshToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,71 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.models import User
+from user.principal import (LocalPrincipalCache, get_principal, local_cache,
+                            principal_cache_key)
+
+
+class PrincipalCacheTests(TestCase):
+    """Tests for the two-tier cache of authenticated principals."""
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create(name='staff', email='staff@test.com', user_type=User.LIBRARY_USER,
+                                        is_active=True)
+
+    def test_cached_principal_needs_no_query(self):
+        """Ensure a known token is resolved without touching the database."""
+        with self.assertNumQueries(1):
+            get_principal(self.user.id, 1000)
+        with self.assertNumQueries(0):
+            principal = get_principal(self.user.id, 1000)
+
+        self.assertEqual(principal.pk, self.user.id)
+        self.assertEqual((principal.name, principal.email, principal.user_type, principal.is_active),
+                         ('staff', 'staff@test.com', User.LIBRARY_USER, True))
+
+    def test_shared_tier_serves_new_tokens(self):
+        """Ensure a token with another iat is served from the shared cache."""
+        get_principal(self.user.id, 1000)
+        with self.assertNumQueries(0):
+            get_principal(self.user.id, 2000)
+        self.assertIsNotNone(cache.get(principal_cache_key(self.user.id)))
+
+    def test_save_invalidates_principal(self):
+        """Ensure a changed user is read again instead of served stale."""
+        get_principal(self.user.id, 1000)
+        self.user.user_type = User.VISITOR_USER
+        self.user.is_active = False
+        self.user.save()
+
+        principal = get_principal(self.user.id, 1000)
+        self.assertEqual((principal.user_type, principal.is_active), (User.VISITOR_USER, False))
+
+    def test_delete_invalidates_principal(self):
+        """Ensure a deleted user's token no longer resolves."""
+        user_id = self.user.id
+        get_principal(user_id, 1000)
+        self.user.delete()
+
+        self.assertIsNone(get_principal(user_id, 1000))
+
+    def test_other_fields_are_loaded_on_access(self):
+        """Ensure fields outside the cached set are still available from a cached principal."""
+        principal = get_principal(self.user.id, 1000)
+        with self.assertNumQueries(1):
+            self.assertEqual(principal.password, self.user.password)
+
+    def test_local_tier_evicts_and_expires(self):
+        """Ensure the per-process tier drops its least recently used and expired entries."""
+        lru = LocalPrincipalCache(maxsize=2, ttl=60)
+        lru.set((1, 0), 'a')
+        lru.set((2, 0), 'b')
+        lru.get((1, 0))
+        lru.set((3, 0), 'c')
+        self.assertEqual((lru.get((1, 0)), lru.get((2, 0)), lru.get((3, 0))), ('a', None, 'c'))
+
+        expired = LocalPrincipalCache(maxsize=2, ttl=0)
+        expired.set((1, 0), 'a')
+        self.assertIsNone(expired.get((1, 0)))
@@ -0,0 +1,162 @@
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import User
+from user.bulk import register_visitors
+from user.tasks import (ACTIVATION_EMAIL_MAX_ATTEMPTS,
+                        ACTIVATION_EMAIL_RETRY_DELAY, send_activation_emails)
+
+
+class BulkRegistrationTests(TestCase):
+    """Tests for registering visitors in bulk."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('user:register_bulk')
+        self.staff = User.objects.create(name='staff', email='staff@test.com', user_type=User.LIBRARY_USER,
+                                         is_active=True)
+        self.client.force_authenticate(self.staff)
+        patcher = patch('user.bulk.send_activation_emails.delay')
+        self.send_activation_emails = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def visitor(self, i, **kwargs):
+        return {'name': f'pupil{i}', 'email': f'pupil{i}@school.com', 'password': 'Schoolpass123', **kwargs}
+
+    def test_bulk_register(self):
+        """Ensure valid rows become inactive visitors, invalid ones are reported, and one email task is queued."""
+        users = [
+            self.visitor(0),
+            self.visitor(1, password='short'),
+            self.visitor(2, email='pupil0@school.com'),
+            self.visitor(3, email='staff@test.com'),
+            self.visitor(4, user_type=User.LIBRARY_USER),
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'users': users}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data['processed'], response.data['created']), (5, 2))
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3, 4])
+        self.assertIn('password', response.data['errors'][0]['errors'])
+        self.assertEqual(response.data['errors'][2]['errors'], {'email': ['A user with this email already exists.']})
+
+        created = User.objects.filter(email__endswith='@school.com').order_by('id')
+        self.assertEqual([user.email for user in created], ['pupil0@school.com', 'pupil4@school.com'])
+        self.assertTrue(all(user.user_type == User.VISITOR_USER and not user.is_active for user in created))
+        self.assertTrue(created[0].check_password('Schoolpass123'))
+        self.send_activation_emails.assert_called_once_with(
+            [(user.email, user.name, user.id) for user in created])
+
+    def test_request_hashes_without_pool(self):
+        """Ensure a request hashes in its own process and larger uploads are left to the command."""
+        with patch('user.bulk.ProcessPoolExecutor') as pool:
+            response = self.client.post(self.url, {'users': [self.visitor(i) for i in range(2)]}, format='json')
+        pool.assert_not_called()
+        self.assertEqual(response.data['created'], 2)
+
+        response = self.client.post(self.url, {'users': [self.visitor(i) for i in range(26)]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('register_visitors', response.data['detail'])
+
+    def test_duplicates_within_upload(self):
+        """Ensure an email repeated in the upload is only registered once, whatever the case of its domain."""
+        report = register_visitors([self.visitor(0), self.visitor(1, email='pupil0@SCHOOL.COM')])
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(report['errors'], [{'row': 2, 'errors': {'email': ['Duplicate email in upload.']}}])
+
+    def test_chunks(self):
+        """Ensure rows are processed chunk by chunk with their row numbers kept."""
+        users = [self.visitor(i) for i in range(5)]
+        users[3]['name'] = ''
+
+        report = register_visitors(users, chunk_size=2)
+
+        self.assertEqual((report['processed'], report['created']), (5, 4))
+        self.assertEqual(report['errors'][0]['row'], 4)
+
+    def test_forbidden_for_visitors(self):
+        """Ensure only library staff can register visitors in bulk."""
+        visitor = User.objects.create(name='visitor', email='visitor@test.com', user_type=User.VISITOR_USER)
+        self.client.force_authenticate(visitor)
+        self.assertEqual(self.client.post(self.url, {'users': [self.visitor(0)]}, format='json').status_code,
+                         status.HTTP_403_FORBIDDEN)
+
+    def test_invalid_payload(self):
+        """Ensure a missing or empty user list is rejected."""
+        self.assertEqual(self.client.post(self.url, {'users': []}, format='json').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.post(self.url, [self.visitor(0)], format='json').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+    def test_command(self):
+        """Ensure the command registers the visitors of a CSV file."""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as csv_file:
+            csv_file.write('name,email,password\npupil0,pupil0@school.com,Schoolpass123\npupil1,bad,Schoolpass123\n')
+        self.addCleanup(os.remove, csv_file.name)
+        out, err = StringIO(), StringIO()
+
+        call_command('register_visitors', csv_file.name, stdout=out, stderr=err)
+
+        self.assertTrue(User.objects.filter(email='pupil0@school.com').exists())
+        self.assertIn('Registered 1 of 2 visitors.', out.getvalue())
+        self.assertIn('Row 2: email:', err.getvalue())
+
+    def test_command_unreadable_file(self):
+        """Ensure a file that is not UTF-8 stops the command with an error after registering the rows before it."""
+        with tempfile.NamedTemporaryFile('wb', suffix='.csv', delete=False) as csv_file:
+            csv_file.write('name,email,password\npupil0,pupil0@school.com,Schoolpass123\nRenée,r@school.com,x\n'
+                           .encode('latin-1'))
+        self.addCleanup(os.remove, csv_file.name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaisesMessage(CommandError, 'Line 3 is not valid UTF-8.'):
+                call_command('register_visitors', csv_file.name, stdout=StringIO())
+
+        self.assertTrue(User.objects.filter(email='pupil0@school.com').exists())
+        self.send_activation_emails.assert_called_once()
+
+
+class ActivationEmailsTaskTests(TestCase):
+    """Tests for the batched activation email task."""
+
+    def test_send_activation_emails(self):
+        """Ensure every user gets their own activation link."""
+        result = send_activation_emails([('a@test.com', 'a', 1), ('b@test.com', 'b', 2)])
+
+        self.assertEqual(result, '2 emails sent successfully')
+        self.assertEqual([message.to for message in mail.outbox], [['a@test.com'], ['b@test.com']])
+        self.assertIn('/api/activate/2/', mail.outbox[1].body)
+
+    @patch('user.tasks.send_activation_emails.apply_async')
+    def test_failed_emails_are_retried_alone(self, retry):
+        """Ensure a failing recipient does not stop the others and is the only one sent again later."""
+        send_messages = EmailBackend.send_messages
+
+        def fail_for_b(backend, messages):
+            if messages[0].to == ['b@test.com']:
+                raise OSError
+            return send_messages(backend, messages)
+
+        users = [('a@test.com', 'a', 1), ('b@test.com', 'b', 2), ('c@test.com', 'c', 3)]
+        with patch.object(EmailBackend, 'send_messages', fail_for_b):
+            result = send_activation_emails(users)
+
+        self.assertEqual(result, '2 emails sent, 1 failed')
+        self.assertEqual([message.to for message in mail.outbox], [['a@test.com'], ['c@test.com']])
+        retry.assert_called_once_with(([('b@test.com', 'b', 2)], 2), countdown=ACTIVATION_EMAIL_RETRY_DELAY)
+
+        retry.reset_mock()
+        with patch.object(EmailBackend, 'send_messages', side_effect=OSError):
+            send_activation_emails(users[1:2], attempt=ACTIVATION_EMAIL_MAX_ATTEMPTS)
+        retry.assert_not_called()
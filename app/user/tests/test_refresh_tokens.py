@@ -0,0 +1,97 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from core.models import RefreshToken, User
+from user.tasks import prune_refresh_tokens
+from user.tests.test_user_api import UserApiTestsBase
+
+
+class RefreshTokenApiTests(UserApiTestsBase, TestCase):
+    """Tests for exchanging refresh tokens for new access tokens."""
+
+    def setUp(self):
+        super().setUp()
+        self.refresh_url = reverse('user:token_refresh')
+        with patch('user.tasks.send_activation_email.delay'):
+            self.register_user()
+        self.user = User.objects.get(email=self.user_data['email'])
+        self.user.is_active = True
+        self.user.save()
+        self.refresh_token = self.login_user().data['refresh']
+
+    def refresh(self, token):
+        return self.client.post(self.refresh_url, {'refresh': token}, format='json')
+
+    def logout(self, token, data=None):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return self.client.post(self.logout_url, data, format='json')
+
+    def test_refresh_issues_new_tokens(self):
+        """Ensure a refresh token yields a working access token and a new refresh token."""
+        with patch.object(User, 'check_password') as check_password:
+            response = self.refresh(self.refresh_token)
+        check_password.assert_not_called()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.data['refresh'], self.refresh_token)
+        self.assertEqual(self.logout(response.data['jwt']).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.refresh(response.data['refresh']).status_code, status.HTTP_200_OK)
+
+    def test_refresh_tokens_are_stored_hashed(self):
+        """Ensure the raw refresh token is never stored."""
+        self.assertFalse(RefreshToken.objects.filter(token_hash=self.refresh_token).exists())
+        self.assertEqual(len(RefreshToken.objects.get().token_hash), 64)
+
+    def test_reuse_revokes_family(self):
+        """Ensure replaying a used refresh token revokes every token of its login, but not other logins."""
+        other_login = self.login_user().data['refresh']
+        rotated = self.refresh(self.refresh_token).data['refresh']
+
+        response = self.refresh(self.refresh_token)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.data['detail'], 'Refresh token has already been used')
+        self.assertEqual(self.refresh(rotated).data['detail'], 'Invalid refresh token')
+        self.assertEqual(self.refresh(other_login).status_code, status.HTTP_200_OK)
+
+    def test_invalid_refresh_tokens(self):
+        """Ensure unknown, missing and expired refresh tokens are rejected."""
+        self.assertEqual(self.refresh('unknown').status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.post(self.refresh_url, {}, format='json').status_code,
+                         status.HTTP_403_FORBIDDEN)
+
+        RefreshToken.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.refresh(self.refresh_token).data['detail'], 'Invalid refresh token')
+
+    def test_deactivation_revokes_refresh_tokens(self):
+        """Ensure a deactivated user cannot refresh."""
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.refresh(self.refresh_token).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(RefreshToken.objects.exists())
+
+    def test_logout_revokes_refresh_token(self):
+        """Ensure logging out with a refresh token revokes it."""
+        response = self.logout(self.get_token(), {'refresh': self.refresh_token})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.refresh(self.refresh_token).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_signing_key_from_settings(self):
+        """Ensure access tokens are signed with the configured key."""
+        token = self.get_token()
+        with override_settings(JWT_SIGNING_KEY='another-key'):
+            self.assertEqual(self.logout(token).data['detail'], 'Invalid token')
+
+    def test_prune_refresh_tokens(self):
+        """Ensure expired refresh tokens are deleted and live ones kept."""
+        self.refresh(self.refresh_token)
+        RefreshToken.objects.filter(replaced_at__isnull=False).update(expires_at=timezone.now())
+
+        self.assertEqual(prune_refresh_tokens(), 1)
+        self.assertEqual(RefreshToken.objects.count(), 1)
@@ -0,0 +1,130 @@
+import time
+from unittest.mock import Mock, patch
+
+import jwt
+from django.test import TestCase
+from rest_framework import status
+
+from core.models import User
+from user.revocation import (PRUNE_INTERVAL, MemoryRevocationList,
+                             RedisRevocationList, access_token_lifetime)
+from user.tests.test_user_api import UserApiTestsBase
+
+
+class TokenRevocationApiTests(UserApiTestsBase, TestCase):
+    """Tests for revoking issued tokens on logout, deactivation and deletion."""
+
+    def setUp(self):
+        super().setUp()
+        with patch('user.tasks.send_activation_email.delay'):
+            self.register_user()
+        self.user = User.objects.get(email=self.user_data['email'])
+        self.user.is_active = True
+        self.user.save()
+        self.token = self.get_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def assertTokenRevoked(self):
+        response = self.client.post(self.logout_url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.data['detail'], 'Token has been revoked')
+
+    def test_token_has_jti(self):
+        """Ensure every issued token carries its own id."""
+        payload = jwt.decode(self.token, options={'verify_signature': False})
+        self.assertEqual(len(payload['jti']), 32)
+        self.assertNotEqual(jwt.decode(self.get_token(), options={'verify_signature': False})['jti'],
+                            payload['jti'])
+
+    def test_logout_revokes_token(self):
+        """Ensure a token cannot be used after logging out with it, while other tokens keep working."""
+        other_token = self.get_token()
+        self.assertEqual(self.client.post(self.logout_url, format='json').status_code, status.HTTP_200_OK)
+
+        self.assertTokenRevoked()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {other_token}')
+        self.assertEqual(self.client.post(self.logout_url, format='json').status_code, status.HTTP_200_OK)
+
+    def test_deactivation_revokes_tokens(self):
+        """Ensure tokens issued before a user is deactivated stop working."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        self.assertTokenRevoked()
+
+    def test_deletion_revokes_tokens(self):
+        """Ensure tokens of a deleted user stop working."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+
+        self.assertTokenRevoked()
+
+
+class RevocationListTests(TestCase):
+    """Tests for the revocation list entries and their expiry."""
+
+    def test_entries_expire(self):
+        """Ensure revocations are forgotten once no token they match can still be valid."""
+        revocations = MemoryRevocationList()
+        now = time.time()
+        revocations.revoke_token('expired', now - 1)
+        revocations.revoke_user(1, now - 2 * 3600)
+
+        self.assertFalse(revocations.is_revoked({'id': 1, 'jti': 'expired', 'iat': now - 3 * 3600}))
+
+    @patch('user.revocation.time.time')
+    def test_expired_entries_are_pruned(self, now):
+        """Ensure expired revocations are dropped from memory even if their token or user is never seen again."""
+        now.return_value = 1_000_000.0
+        revocations = MemoryRevocationList()
+        for i in range(100):
+            revocations.revoke_token(f'old{i}', now.return_value + 30)
+            revocations.revoke_user(i)
+        self.assertEqual((len(revocations._tokens), len(revocations._users)), (100, 100))
+
+        now.return_value += PRUNE_INTERVAL
+        revocations.revoke_token('live', now.return_value + 30)
+        self.assertEqual((len(revocations._tokens), len(revocations._users)), (1, 100))
+
+        now.return_value += access_token_lifetime()
+        revocations.is_revoked({'id': 1000, 'jti': 'other', 'iat': int(now.return_value)})
+        self.assertEqual((len(revocations._tokens), len(revocations._users)), (0, 0))
+
+    def test_user_revocation_spares_later_tokens(self):
+        """Ensure a user revocation only rejects tokens issued before it."""
+        revocations = MemoryRevocationList()
+        now = time.time()
+        revocations.revoke_user(1, now - 10)
+
+        self.assertTrue(revocations.is_revoked({'id': 1, 'jti': 'a', 'iat': int(now - 20)}))
+        self.assertFalse(revocations.is_revoked({'id': 1, 'jti': 'b', 'iat': int(now)}))
+        self.assertFalse(revocations.is_revoked({'id': 2, 'jti': 'c', 'iat': int(now - 20)}))
+
+    def test_redis_messages_update_local_copy(self):
+        """Ensure revocations published by other processes are applied to the local copy."""
+        revocations = RedisRevocationList('redis://localhost:6379/0')
+        now = time.time()
+        revocations._apply({'jti': 'a', 'expires_at': now + 60})
+        revocations._apply({'user': 2, 'revoked_at': now})
+
+        self.assertTrue(MemoryRevocationList.is_revoked(revocations, {'id': 1, 'jti': 'a', 'iat': int(now)}))
+        self.assertTrue(MemoryRevocationList.is_revoked(revocations, {'id': 2, 'jti': 'b', 'iat': int(now)}))
+
+    @patch('user.revocation.time.sleep')
+    def test_lost_channel_closes_subscription(self, sleep):
+        """Ensure the listener closes a broken subscription before subscribing again."""
+        import redis
+
+        class Stop(Exception):
+            pass
+
+        revocations = RedisRevocationList('redis://localhost:6379/0')
+        broken = Mock(**{'listen.side_effect': redis.ConnectionError})
+        renewed = Mock(**{'listen.side_effect': Stop})
+        with patch.object(revocations, '_subscribe', side_effect=[redis.ConnectionError, renewed]):
+            with self.assertRaises(Stop):
+                revocations._listen(broken)
+
+        broken.close.assert_called_once()
+        self.assertEqual(sleep.call_count, 2)
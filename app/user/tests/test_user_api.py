@@ -1,17 +1,25 @@
 from unittest.mock import patch
 
+from django.core.cache import cache
 from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from core.models import User
+from core.throttling import get_buckets
+from user.principal import local_cache
+from user.revocation import get_revocation_list
 
 
 class UserApiTestsBase(TestCase):
     """Base class with common setup and helper methods."""
 
     def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        get_revocation_list().clear()
+        get_buckets().clear()
         self.client = APIClient()
         self.register_url = reverse('user:register')
         self.login_url = reverse('user:login')
@@ -47,6 +55,19 @@ class UserApiTestsBase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         return response.data['jwt']
 
+    def authenticate(self, user_type=User.LIBRARY_USER):
+        """Helper method to register, activate and log in a user of ``user_type``."""
+        with patch('user.tasks.send_activation_email.delay'):
+            self.register_user()
+
+        user = User.objects.get(email=self.user_data['email'])
+        user.is_active = True
+        user.user_type = user_type
+        user.save()
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.get_token()}')
+        return user
+
 
 class UserApiTests(UserApiTestsBase):
     @patch('user.tasks.send_activation_email.delay')  # Mocking the Celery task
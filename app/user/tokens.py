@@ -0,0 +1,85 @@
+import datetime
+import hashlib
+import secrets
+import uuid
+
+import jwt
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import RefreshToken
+
+
+class RefreshTokenError(Exception):
+    """
+    Raised when a refresh token is unknown, expired, reused or belongs to a user who can no longer log in.
+    """
+
+
+def issue_access_token(user):
+    """
+    Return a signed JWT access token for ``user``.
+    """
+    now = datetime.datetime.utcnow()
+    payload = {
+        'id': user.id,
+        'jti': uuid.uuid4().hex,
+        'exp': now + datetime.timedelta(minutes=settings.JWT_ACCESS_TOKEN_MINUTES),
+        'iat': now
+    }
+    return jwt.encode(payload, settings.JWT_SIGNING_KEY, algorithm='HS256')
+
+
+def decode_access_token(token):
+    return jwt.decode(token, settings.JWT_SIGNING_KEY, algorithms=['HS256'])
+
+
+def hash_refresh_token(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue_refresh_token(user, family=None):
+    """
+    Store a new refresh token of ``family`` (a new family when omitted) and return its raw value, which is only
+    ever known to the client.
+    """
+    token = secrets.token_urlsafe(32)
+    RefreshToken.objects.create(
+        user=user,
+        token_hash=hash_refresh_token(token),
+        family=family or uuid.uuid4(),
+        expires_at=timezone.now() + datetime.timedelta(days=settings.JWT_REFRESH_TOKEN_DAYS),
+    )
+    return token
+
+
+def rotate_refresh_token(token):
+    """
+    Exchange a refresh token for a new access and refresh token pair without checking the password.
+
+    A token that was already exchanged is being replayed, by the client or by someone who stole it, so its whole
+    family is revoked and both parties have to log in again.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        record = (RefreshToken.objects.select_for_update(of=('self',)).select_related('user')
+                  .filter(token_hash=hash_refresh_token(token)).first())
+        if record is None or record.expires_at <= now or not record.user.is_active:
+            raise RefreshTokenError('Invalid refresh token')
+
+        if record.replaced_at is None:
+            record.replaced_at = now
+            record.save(update_fields=['replaced_at'])
+            return issue_access_token(record.user), issue_refresh_token(record.user, record.family)
+
+        RefreshToken.objects.filter(family=record.family).delete()
+    raise RefreshTokenError('Refresh token has already been used')
+
+
+def revoke_refresh_token(user, token):
+    """
+    Revoke the family of one of ``user``'s refresh tokens, e.g. on logout.
+    """
+    family = RefreshToken.objects.filter(user=user, token_hash=hash_refresh_token(token)).values('family')
+    RefreshToken.objects.filter(family__in=family).delete()
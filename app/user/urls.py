@@ -1,18 +1,22 @@
 from django.urls import path
 
-from .views import (ActivateUserView, DeleteUserView, DeleteVisitorUserView,
-                    LoginView, LogoutView, RegisterView)
+from .views import (ActivateUserView, BulkRegisterView, DeleteUserView,
+                    DeleteVisitorUserView, LoginView, LogoutView, RegisterView,
+                    TokenRefreshView)
 
 app_name = 'user'
 
 """
-URL patterns for user-related operations including registration, activation, login, logout, and user deletion.
+URL patterns for user-related operations including registration, activation, login, token refresh, logout, and user
+deletion.
 """
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
+    path('register/bulk/', BulkRegisterView.as_view(), name='register_bulk'),
     path('activate/<int:user_id>/', ActivateUserView.as_view(), name='activate_user'),
     path('login/', LoginView.as_view(), name='login'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('delete/', DeleteUserView.as_view(), name='delete_library_user'),
     path('delete-visitor/<int:user_id>/', DeleteVisitorUserView.as_view(), name='delete_visitor_user'),
@@ -1,6 +1,3 @@
-import datetime
-
-import jwt
 from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import status
@@ -10,9 +7,15 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from core.models import BorrowRecord, User
+from core.throttling import EmailTokenBucketThrottle, IPTokenBucketThrottle
 
+from . import bulk
+from .revocation import get_revocation_list
 from .serializers import UserSerializer
 from .tasks import send_activation_email
+from .tokens import (RefreshTokenError, issue_access_token,
+                     issue_refresh_token, revoke_refresh_token,
+                     rotate_refresh_token)
 
 
 class RegisterView(APIView):
@@ -21,6 +24,8 @@ class RegisterView(APIView):
 
     POST request data should include 'email' and 'password'.
     """
+    throttle_classes = (IPTokenBucketThrottle, EmailTokenBucketThrottle)
+    throttle_scope = 'register'
 
     def post(self, request):
         serializer = UserSerializer(data=request.data)
@@ -33,6 +38,34 @@ class RegisterView(APIView):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+class BulkRegisterView(APIView):
+    """
+    Registers a few visitors at once, e.g. a small group, and sends their activation emails in one batch. Larger
+    uploads, such as a whole school, go through the register_visitors management command.
+
+    Requires authentication; only library users can register visitors in bulk.
+    POST request data should include 'users', a list of at most 25 objects with 'name', 'email' and 'password'.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        if request.user.user_type != User.LIBRARY_USER:
+            return Response({'detail': 'Only library users can register visitors in bulk.'},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        users = request.data.get('users') if hasattr(request.data, 'get') else None
+        if not isinstance(users, list) or not users:
+            return Response({'detail': "'users' must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(users) > bulk.MAX_BULK_REGISTRATIONS:
+            return Response({'detail': f'At most {bulk.MAX_BULK_REGISTRATIONS} users can be registered at once; '
+                                       f'use the register_visitors command for larger uploads.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # Hash in this process: forking a pool from a web worker is unsafe, and the small cap keeps it quick.
+        report = bulk.register_visitors(users, hash_workers=1)
+        return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_200_OK)
+
+
 class ActivateUserView(APIView):
     """
     Activates a user account. The user must be found by their ID and must not already be active.
@@ -57,10 +90,12 @@ class ActivateUserView(APIView):
 
 class LoginView(APIView):
     """
-    Authenticates a user and provides a JWT token upon successful login.
+    Authenticates a user and provides a JWT token and a refresh token upon successful login.
 
     POST request data should include 'email' and 'password'.
     """
+    throttle_classes = (IPTokenBucketThrottle, EmailTokenBucketThrottle)
+    throttle_scope = 'login'
 
     def post(self, request):
         email = request.data['email']
@@ -70,26 +105,47 @@ class LoginView(APIView):
         if not user or not user.check_password(password) or not user.is_active:
             raise AuthenticationFailed('User not found or password is incorrect')
 
-        payload = {
-            'id': user.id,
-            'exp': datetime.datetime.utcnow() + datetime.timedelta(minutes=60),
-            'iat': datetime.datetime.utcnow()
-        }
+        return Response({'jwt': issue_access_token(user), 'refresh': issue_refresh_token(user), 'id': user.id,
+                         'user_type': user.user_type})
+
+
+class TokenRefreshView(APIView):
+    """
+    Exchanges a refresh token for a new JWT token and a new refresh token, without checking the password.
+
+    POST request data should include 'refresh'. Each refresh token can be used once; reusing one revokes every
+    refresh token descended from the same login.
+    """
+    authentication_classes = ()
 
-        token = jwt.encode(payload, 'secret', algorithm='HS256')
+    def post(self, request):
+        token = request.data.get('refresh')
+        if not isinstance(token, str) or not token:
+            raise AuthenticationFailed('Invalid refresh token')
 
-        return Response({'jwt': token, 'id': user.id, 'user_type': user.user_type})
+        try:
+            access, refresh = rotate_refresh_token(token)
+        except RefreshTokenError as e:
+            raise AuthenticationFailed(str(e))
+
+        return Response({'jwt': access, 'refresh': refresh})
 
 
 class LogoutView(APIView):
     """
-    Handles user logout by deleting the JWT cookie.
+    Handles user logout by revoking the JWT token it was called with, and the refresh token if one is given in
+    'refresh', and deleting the JWT cookie.
 
     Requires authentication.
     """
     permission_classes = (IsAuthenticated,)
 
     def post(self, request):
+        if request.auth and 'jti' in request.auth:
+            get_revocation_list().revoke_token(request.auth['jti'], request.auth['exp'])
+        if isinstance(request.data.get('refresh'), str):
+            revoke_refresh_token(request.user, request.data['refresh'])
+
         response = Response()
         response.delete_cookie('jwt')
         response.data = {